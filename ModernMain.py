@@ -6,67 +6,147 @@ different coordinate systems with real-time notation conversion
 (prefix, infix, postfix).
 """
 
+import sys
+import time
+
+# Time every import from here on, like python -X importtime
+if '--startup-report' in sys.argv:
+    from startup_report import StartupReport
+    startup_report = StartupReport().install()
+else:
+    startup_report = None
+
 from customtkinter import CTkFrame as Frame, CTkLabel as Label
 from customtkinter import StringVar, WORD, CTkEntry as Entry
 from customtkinter import CTkButton as Button, CTk as Tk
-from customtkinter import CTkTextbox as Text, BOTH, END, SUNKEN
+from customtkinter import CTkTextbox as Text, BOTH, END, SUNKEN, BOTTOM, X
 from customtkinter import set_default_color_theme, set_appearance_mode
+from customtkinter import get_appearance_mode
 from customtkinter import CTkToplevel as Toplevel, CTkImage
-from tkinter import ttk, messagebox
+from customtkinter import CTkCheckBox as CheckBox, BooleanVar, ThemeManager
+from tkinter import ttk, messagebox, TclError
 from abc import ABC, abstractmethod
 from PIL import Image
-import Speech2Text, OCR
-import sys
+import logging
 import os
+import queue
+import threading
 
-import matplotlib
-matplotlib.use('TkAgg')
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, \
-                                              NavigationToolbar2Tk
-from matplotlib.figure import Figure
-import numpy as np
+# Matplotlib, the speech and OCR stacks and mplot3d load on first use
 MATPLOTLIB_AVAILABLE = True
 
 from expression_parser import ExpressionParser
-from plotters import Plotter2D, Plotter3D, PlotterPolar, PlotterSpherical
+from plot_worker import PlotWorker
 
 
 # Add current directory to path for imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 assets_addr_v = ".\\_internal\\Assets\\"
 
+logger = logging.getLogger(__name__)
+
 
 class ThemesAndAppear(ABC):
+    """Theme switching in place, without rebuilding the window
+    
+    Appearance mode (light/dark) updates live in customtkinter, but a color
+    theme only reaches widgets created after it is loaded. apply_theme()
+    walks the existing widgets and moves every color still at the old
+    theme's default to the new theme's, leaving explicit colors alone,
+    and gives the plot figures the new background and text colors.
+    """
+    
+    def apply_theme(self, theme_path, mode):
+        """Load theme_path and switch to mode, re-coloring existing widgets"""
+        old_theme = ThemeManager.theme
+        set_default_color_theme(theme_path)
+        set_appearance_mode(mode)
         
-    def light_theme_m(self):
-        set_default_color_theme("_internal/Themes/dark-blue.json")
-        set_appearance_mode("light")
-        self.root.destroy()
-        self.root.update()
-        main()
+        widgets = [self.root]
+        while widgets:
+            widget = widgets.pop()
+            self.recolor_widget(widget, old_theme, ThemeManager.theme)
+            widgets.extend(widget.winfo_children())
+        self.recolor_figures()
+    
+    def theme_color(self, widget_name, key):
+        """Theme color of widget_name in the current mode, as #rrggbb"""
+        color = ThemeManager.theme[widget_name][key]
+        if isinstance(color, (list, tuple)):
+            color = color[get_appearance_mode() == "Dark"]
+        # Theme colors may be Tk names such as gray17, unknown to matplotlib
+        red, green, blue = self.root.winfo_rgb(color)
+        return f"#{red >> 8:02x}{green >> 8:02x}{blue >> 8:02x}"
+    
+    def recolor_figures(self):
+        """Color the plot figures like the window and redraw them"""
+        if not MATPLOTLIB_AVAILABLE:
+            return
+        import matplotlib
+        
+        background = self.theme_color('CTkFrame', 'fg_color')
+        face = self.theme_color('CTkEntry', 'fg_color')
+        text = self.theme_color('CTkLabel', 'text_color')
+        # Axes created by later plots pick these up too
+        matplotlib.rcParams.update({
+            'axes.facecolor': face, 'axes.edgecolor': text,
+            'axes.labelcolor': text, 'axes.titlecolor': text,
+            'xtick.color': text, 'ytick.color': text, 'text.color': text})
+        
+        for name in ('2d', '3d', 'polar', 'spherical', 'implicit'):
+            figure = getattr(self, f'fig_{name}', None)
+            if figure is None:
+                continue
+            figure.set_facecolor(background)
+            for ax in figure.axes:
+                ax.set_facecolor(face)
+                ax.title.set_color(text)
+                for axis in (ax.xaxis, ax.yaxis, getattr(ax, 'zaxis', None)):
+                    if axis is not None:
+                        axis.label.set_color(text)
+                        axis.set_tick_params(colors=text)
+            getattr(self, f'canvas_{name}').draw_idle()
+    
+    def recolor_widget(self, widget, old_theme, new_theme):
+        """Move widget's default colors from old_theme to new_theme"""
+        name = type(widget).__name__
+        if name not in old_theme or name not in new_theme:
+            return
+        old, new = old_theme[name], new_theme[name]
         
+        same = lambda a, b: (tuple(a) if isinstance(a, list) else a) == \
+                            (tuple(b) if isinstance(b, list) else b)
+        changes = {}
+        for key in new:
+            if not key.endswith('color') or key == 'top_fg_color':
+                continue
+            try:
+                current = widget.cget(key)
+            except (ValueError, TclError):
+                continue
+            
+            # Nested frames default to the theme's top_fg_color
+            sources = ('fg_color', 'top_fg_color') if key == 'fg_color' \
+                      else (key,)
+            for source in sources:
+                if source in old and source in new and same(current,
+                                                            old[source]):
+                    changes[key] = new[source]
+                    break
+        if changes:
+            widget.configure(**changes)
+    
+    def light_theme_m(self):
+        self.apply_theme("_internal/Themes/dark-blue.json", "light")
+    
     def dark_theme_m(self):
-        set_default_color_theme("_internal/Themes/dark-blue.json")
-        set_appearance_mode("dark")
-        self.root.destroy()
-        self.root.update()
-        main()
-
+        self.apply_theme("_internal/Themes/dark-blue.json", "dark")
+    
     def light_rose_theme_m(self, path_v = ""):
-        set_default_color_theme("_internal/Themes/rose.json")
-        set_appearance_mode("light")
-        self.root.destroy()
-        self.root.update()
-        main()
-
+        self.apply_theme("_internal/Themes/rose.json", "light")
+    
     def dark_rose_theme_m(self, path_v = ""):
-        set_default_color_theme("_internal/Themes/rose.json")
-        set_appearance_mode("dark")
-        self.root.destroy()
-        self.root.update()
-        del self.root, self
-        main()
+        self.apply_theme("_internal/Themes/rose.json", "dark")
 
 class ExpressionPlotterGUI(ThemesAndAppear):
     
@@ -79,6 +159,13 @@ class ExpressionPlotterGUI(ThemesAndAppear):
         # Initialize expression parser
         self.parser = ExpressionParser()
         
+        # Plot sampling runs here, off the Tk main loop
+        self.worker = PlotWorker(root)
+        
+        # Limits for progressive refinement of surface plots
+        self.lod_time_budget = 1.5
+        self.lod_point_budget = 512 * 512
+        
         # Create main frame
         self.main_frame = Frame(root)
         self.main_frame.grid(row=0, column=0, sticky=("wens"), padx=5, pady=5)
@@ -90,10 +177,6 @@ class ExpressionPlotterGUI(ThemesAndAppear):
         self.main_frame.rowconfigure(1, weight=1)
         
         self.setup_ui()
-        
-        # Show matplotlib availability warning if needed
-        if not MATPLOTLIB_AVAILABLE:
-            self.show_matplotlib_warning()
     
     def show_matplotlib_warning(self):
         """Show warning about matplotlib availability"""
@@ -116,6 +199,24 @@ class ExpressionPlotterGUI(ThemesAndAppear):
         
         # Tabbed plotting interface
         self.setup_plotting_tabs()
+        
+        # Re-plot while typing when enabled
+        self.setup_live_mode()
+        
+        # Grid backend and timing of the last surface
+        self.status_var = StringVar(value="")
+        Label(self.main_frame, textvariable=self.status_var,
+              anchor="w").grid(row=2, column=0, columnspan=2, sticky="we")
+    
+    def show_grid_timing(self, plotter):
+        """Show which backend evaluated plotter's last grid, and how fast"""
+        timing = plotter.grid_timing
+        if timing is None:
+            return
+        plotter.grid_timing = None
+        backend, points, seconds = timing
+        self.status_var.set(f"{plotter.name} grid: {points:,} points by "
+                            f"{backend} in {seconds * 1e3:.0f} ms")
     
     def setup_expression_input(self):
         """Setup expression input section"""
@@ -161,6 +262,19 @@ class ExpressionPlotterGUI(ThemesAndAppear):
                            width= 50,
                            command = lambda: self.parse_and_plot(2))
         audio_btn.grid(row=0, column=4, sticky="e", padx = (5,0))
+        self.audio_btn = audio_btn
+        
+        # Load the speech model while the pointer is on its way to Audio
+        self.speech_preload = None
+        self.speech_error = None
+        self.speech_starting = False
+        self.speech_session = None
+        audio_btn.bind("<Enter>", self.preload_speech, add="+")
+        
+        self.live_var = BooleanVar(value=False)
+        CheckBox(input_frame, text="Live", width=50,
+                 variable=self.live_var).grid(row=0, column=5, sticky="e",
+                                              padx=(10, 0))
         
         # Bind Enter key to parse
         self.expression_entry.bind('<Return>', lambda e: self.parse_and_plot(3))
@@ -231,6 +345,7 @@ class ExpressionPlotterGUI(ThemesAndAppear):
         self.setup_3d_tab()
         self.setup_polar_tab()
         self.setup_spherical_tab()
+        self.setup_implicit_tab()
         self.theme_selection_tab()
 
             
@@ -260,19 +375,14 @@ class ExpressionPlotterGUI(ThemesAndAppear):
         Button(controls_2d, text="Plot 2D",
                    command=self.plot_2d).grid(row=0, column=4)
         
+        self.adaptive_2d_var = BooleanVar(value=False)
+        CheckBox(controls_2d, text="Adaptive", variable=self.adaptive_2d_var,
+                 command=self.plot_2d).grid(row=0, column=5, padx=(10, 0))
+        
         # Plot area
         self.plot_frame_2d = Frame(tab_2d, width = 500, height = 300)
         self.plot_frame_2d.grid(row=1, column=0, padx = 5, pady = (0, 5),
                                 sticky=("wens"))
-        
-        if MATPLOTLIB_AVAILABLE:
-            self.fig_2d = Figure(figsize=(5, 3), dpi=100)
-            self.canvas_2d = FigureCanvasTkAgg(self.fig_2d,
-                                               self.plot_frame_2d)
-            self.canvas_2d.get_tk_widget().pack(fill=BOTH, expand=True)
-        else:
-            self.create_placeholder_plot(self.plot_frame_2d,
-                                         "2D Plot\n(Matplotlib not available)")
     
     def setup_3d_tab(self):
         """Setup 3D plotting tab"""
@@ -295,18 +405,14 @@ class ExpressionPlotterGUI(ThemesAndAppear):
                    command=self.plot_3d).grid(row=0, column=2, padx=(5, 0),
                                               sticky="e")
         
+        self.adaptive_3d_var = BooleanVar(value=False)
+        CheckBox(controls_3d, text="Adaptive", variable=self.adaptive_3d_var,
+                 command=self.plot_3d).grid(row=0, column=3, padx=(10, 0))
+        
         # Plot area
         self.plot_frame_3d = Frame(tab_3d, width = 400, height = 200)
         self.plot_frame_3d.grid(row=1, column=0, padx = 5, pady = (0, 5),
                                 sticky=("wens"))
-        
-        if MATPLOTLIB_AVAILABLE:
-            self.fig_3d = Figure(figsize=(4, 2), dpi=80)
-            self.canvas_3d = FigureCanvasTkAgg(self.fig_3d, self.plot_frame_3d)
-            self.canvas_3d.get_tk_widget().pack(fill=BOTH, expand=True)
-        else:
-            self.create_placeholder_plot(self.plot_frame_3d,
-                                         "3D Plot\n(Matplotlib not available)")
     
     def setup_polar_tab(self):
         """Setup polar plotting tab"""
@@ -333,16 +439,6 @@ class ExpressionPlotterGUI(ThemesAndAppear):
         self.plot_frame_polar = Frame(tab_polar, width = 400, height = 200)
         self.plot_frame_polar.grid(row=1, column=0, padx = 5, pady = (0, 5),
                                    sticky=("wens"))
-        
-        if MATPLOTLIB_AVAILABLE:
-            self.fig_polar = Figure(figsize=(4, 2), dpi=80)
-            self.canvas_polar = FigureCanvasTkAgg(self.fig_polar,
-                                                  self.plot_frame_polar)
-            self.canvas_polar.get_tk_widget().pack(fill=BOTH, expand=True)
-        else:
-            self.create_placeholder_plot(self.plot_frame_polar,
-                                         "Polar Plot\n"
-                                         "(Matplotlib not available)")
     
     def setup_spherical_tab(self):
         """Setup spherical plotting tab"""
@@ -372,15 +468,114 @@ class ExpressionPlotterGUI(ThemesAndAppear):
         self.plot_frame_spherical.grid(row = 1, column = 0,
                                        padx = 5, pady = (0, 5),
                                        sticky=("wens"))
+    
+    def setup_implicit_tab(self):
+        """Setup implicit curve plotting tab"""
+        tab_implicit = self.tab_implicit = Frame(self.notebook)
+        self.notebook.add(tab_implicit, text="Implicit Plot")
+        tab_implicit.columnconfigure(0, weight=1)
+        tab_implicit.rowconfigure(1, weight=1)
+        
+        # Controls frame
+        controls_implicit = Frame(tab_implicit)
+        controls_implicit.grid(row=0, column=0, sticky=("we"),
+                               pady = 5, padx = 5)
+        controls_implicit.columnconfigure(1, weight=1)
+        Label(controls_implicit, text="f(x,y) = g(x,y):").grid(row=0, column=0,
+                                                              padx=(2, 5))
+        self.expr_implicit_var = StringVar(value="(x^2 + y^2)^2 = "
+                                                 "4*(x^2 - y^2)")
+        Entry(controls_implicit, textvariable=self.expr_implicit_var).\
+                                 grid(row=0, column=1, sticky = "we")
+        Button(controls_implicit, text="Plot Implicit",
+                   command=self.plot_implicit).grid(row=0, column=2,
+                                                    padx=(5,0), sticky = "e")
+        
+        # Plot area
+        self.plot_frame_implicit = Frame(tab_implicit,
+                                         width = 400, height = 200)
+        self.plot_frame_implicit.grid(row = 1, column = 0,
+                                      padx = 5, pady = (0, 5),
+                                      sticky=("wens"))
+    
+    def setup_figures(self):
+        """Create the plot figures and plotters
+        
+        Matplotlib and the plotters are imported here rather than at module
+        import, so main() can show the window before loading them.
+        """
+        global MATPLOTLIB_AVAILABLE
+        try:
+            import matplotlib
+            matplotlib.use('TkAgg')
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, \
+                                                          NavigationToolbar2Tk
+            from matplotlib.figure import Figure
+            from plotters import Plotter2D, Plotter3D, PlotterPolar, \
+                                 PlotterSpherical, PlotterImplicit
+        except ImportError:
+            MATPLOTLIB_AVAILABLE = False
+        
+        if MATPLOTLIB_AVAILABLE:
+            self.fig_2d = Figure(figsize=(5, 3), dpi=100)
+            self.canvas_2d = FigureCanvasTkAgg(self.fig_2d,
+                                               self.plot_frame_2d)
+            # Pan/zoom re-samples the visible interval through plotter_2d,
+            # on the worker like every other plot
+            self.plotter_2d = Plotter2D()
+            self.plotter_2d.schedule = lambda compute, draw: \
+                self.worker.submit('2d-view', compute, draw)
+            toolbar_2d = NavigationToolbar2Tk(self.canvas_2d,
+                                              self.plot_frame_2d,
+                                              pack_toolbar=False)
+            toolbar_2d.pack(side=BOTTOM, fill=X)
+            self.canvas_2d.get_tk_widget().pack(fill=BOTH, expand=True)
+        else:
+            self.create_placeholder_plot(self.plot_frame_2d,
+                                         "2D Plot\n(Matplotlib not available)")
+        
+        if MATPLOTLIB_AVAILABLE:
+            self.fig_3d = Figure(figsize=(4, 2), dpi=80)
+            self.canvas_3d = FigureCanvasTkAgg(self.fig_3d, self.plot_frame_3d)
+            self.plotter_3d = Plotter3D()
+            self.canvas_3d.get_tk_widget().pack(fill=BOTH, expand=True)
+        else:
+            self.create_placeholder_plot(self.plot_frame_3d,
+                                         "3D Plot\n(Matplotlib not available)")
+        
+        if MATPLOTLIB_AVAILABLE:
+            self.fig_polar = Figure(figsize=(4, 2), dpi=80)
+            self.canvas_polar = FigureCanvasTkAgg(self.fig_polar,
+                                                  self.plot_frame_polar)
+            self.plotter_polar = PlotterPolar()
+            self.canvas_polar.get_tk_widget().pack(fill=BOTH, expand=True)
+        else:
+            self.create_placeholder_plot(self.plot_frame_polar,
+                                         "Polar Plot\n"
+                                         "(Matplotlib not available)")
         
         if MATPLOTLIB_AVAILABLE:
             self.fig_spherical = Figure(figsize=(5, 3), dpi=100)
             self.canvas_spherical = FigureCanvasTkAgg(self.fig_spherical,
                                                       self.plot_frame_spherical)
+            self.plotter_spherical = PlotterSpherical()
             self.canvas_spherical.get_tk_widget().pack(fill=BOTH, expand=True)
         else:
             self.create_placeholder_plot(self.plot_frame_spherical,
                                          "Spherical Plot\n(Matplotlib not available)")
+        
+        if MATPLOTLIB_AVAILABLE:
+            self.fig_implicit = Figure(figsize=(5, 3), dpi=100)
+            self.canvas_implicit = FigureCanvasTkAgg(self.fig_implicit,
+                                                     self.plot_frame_implicit)
+            self.plotter_implicit = PlotterImplicit()
+            self.canvas_implicit.get_tk_widget().pack(fill=BOTH, expand=True)
+        else:
+            self.create_placeholder_plot(self.plot_frame_implicit,
+                                         "Implicit Plot\n(Matplotlib not available)")
+        
+        if not MATPLOTLIB_AVAILABLE:
+            self.show_matplotlib_warning()
     
     def theme_selection_tab(self):
         """Setup app themes tab"""
@@ -435,6 +630,67 @@ class ExpressionPlotterGUI(ThemesAndAppear):
 
     
         
+    def setup_live_mode(self):
+        """Watch the expression entries for live re-plotting"""
+        # Milliseconds of typing silence before the full-resolution plot
+        self.live_delay = 300
+        self._live_after = {}
+        self._live_normalized = {}
+        
+        # channel: (variable, plot method, coarse preview resolution)
+        self.live_channels = {
+            '2d': (self.expression_var, self.plot_2d, 100),
+            '3d': (self.expr_3d_var, self.plot_3d, 15),
+            'polar': (self.expr_polar_var, self.plot_polar, 200),
+            'spherical': (self.expr_spherical_var, self.plot_spherical, 12),
+            'implicit': (self.expr_implicit_var, self.plot_implicit, 8),
+        }
+        for channel, (variable, _, _) in self.live_channels.items():
+            variable.trace_add('write', lambda *args, channel=channel:
+                               self.on_expression_edited(channel))
+    
+    def on_expression_edited(self, channel):
+        """Preview coarsely at once, plot in full once typing pauses"""
+        if not self.live_var.get() or not MATPLOTLIB_AVAILABLE:
+            return
+        
+        variable, plot, preview_points = self.live_channels[channel]
+        try:
+            expression = variable.get().strip()
+            if channel == 'implicit':
+                expression = self.plotter_implicit.relation(expression)
+            compiled = self.parser.compile(expression)
+        except Exception:
+            # Half-typed expression; wait for the next keystroke, and do not
+            # let a pending full plot render it as an error
+            pending = self._live_after.pop(channel, None)
+            if pending is not None:
+                self.root.after_cancel(pending)
+                # Retyping the same expression must schedule it again
+                self._live_normalized.pop(channel, None)
+            return
+        if compiled.normalized == self._live_normalized.get(channel):
+            return
+        self._live_normalized[channel] = compiled.normalized
+        
+        if channel == '2d':
+            self.show_notations(compiled)
+        
+        # The worker keeps only the newest request per channel, so a burst
+        # of previews never queues up
+        plot(num_points=preview_points)
+        
+        pending = self._live_after.pop(channel, None)
+        if pending is not None:
+            self.root.after_cancel(pending)
+        self._live_after[channel] = self.root.after(
+            self.live_delay, self.live_full_plot, channel)
+    
+    def live_full_plot(self, channel):
+        """Full-resolution plot after the typing burst settles"""
+        self._live_after.pop(channel, None)
+        self.live_channels[channel][1]()
+    
     def create_placeholder_plot(self, parent, text):
         """Create placeholder when matplotlib is not available"""
         placeholder = Label(parent, text=text, font=('Arial', 16), 
@@ -442,28 +698,111 @@ class ExpressionPlotterGUI(ThemesAndAppear):
                              relief=SUNKEN, bd=2)
         placeholder.pack(fill=BOTH, expand=True, padx=10, pady=10)
     
+    def preload_speech(self, event=None):
+        """Start loading the speech model in the background, once"""
+        if self.speech_preload is None:
+            self.speech_preload = threading.Thread(
+                target=self.load_speech, name='speech-import', daemon=True)
+            self.speech_preload.start()
+    
+    def load_speech(self):
+        """Import Speech2Text and load its model, off the Tk thread"""
+        self.speech_error = None
+        try:
+            import Speech2Text
+            Speech2Text.service().load()
+        except Exception as e:
+            # start_recording reports it, and the next press loads again
+            logger.warning("Speech model preload failed: %s", e)
+            self.speech_error = e
+    
+    def toggle_recording(self):
+        """Start voice input, or stop the recording in progress"""
+        if self.speech_session is not None:
+            self.speech_session.stop()
+            return
+        if self.speech_starting:
+            # Already waiting for the model
+            return
+        
+        self.preload_speech()
+        self.speech_starting = True
+        self.audio_btn.configure(text="Loading")
+        self.start_recording()
+    
+    def start_recording(self):
+        """Tk side: start the session once the model is loaded"""
+        if self.speech_preload.is_alive():
+            # Loading the model takes seconds; never block the Tk thread
+            self.root.after(50, self.start_recording)
+            return
+        
+        self.speech_starting = False
+        error = self.speech_error
+        if error is None:
+            try:
+                import Speech2Text
+                self.speech_session = Speech2Text.service().start()
+            except Exception as e:
+                error = e
+        if error is not None:
+            # Load again on the next press
+            self.speech_preload = None
+            self.audio_btn.configure(text="Audio")
+            messagebox.showerror("Voice Input Error",
+                                 f"Error starting voice input: {str(error)}")
+            return
+        self.audio_btn.configure(text="Stop")
+        self.poll_speech()
+    
+    def poll_speech(self):
+        """Tk side: show speech results in the entry as they arrive"""
+        session = self.speech_session
+        while True:
+            try:
+                kind, value = session.events.get_nowait()
+            except queue.Empty:
+                break
+            
+            if kind in ('partial', 'result'):
+                self.expression_var.set(value)
+            elif kind == 'error':
+                messagebox.showerror("Voice Input Error", str(value))
+            elif kind == 'done':
+                self.speech_session = None
+                self.audio_btn.configure(text="Audio")
+                logger.info("Voice input finished: %s", session.stats())
+                self.expression_var.set(value)
+                self.parse_and_plot(3)
+                return
+        self.root.after(50, self.poll_speech)
+    
     def parse_and_plot(self, expression):
         if expression == 1:
+            import OCR
             self.expression_var.set(OCR.main())
         elif expression == 2:
-            self.expression_var.set(Speech2Text.main())
+            # Recording runs in the background, results arrive in poll_speech
+            self.toggle_recording()
+            return
         """Parse expression and update notation displays"""
         expression = self.expression_var.get().strip()
         if not expression:
             return
         
+        if '=' in expression:
+            # A relation such as "y is equal to x^2" from speech or OCR
+            self.expr_implicit_var.set(expression)
+            self.notebook.select(self.tab_implicit)
+            self.plot_implicit()
+            return
+        
         try:
-            # Parse expression
-            infix = self.parser.normalize_expression(expression)
-            prefix = self.parser.infix_to_prefix(infix)
-            postfix = self.parser.infix_to_postfix(infix)
-            tree_repr = self.parser.get_parse_tree_representation(infix)
+            # Parse expression once and render every notation from its tree
+            compiled = self.parser.compile(expression)
             
             # Update displays
-            self.update_text_widget(self.infix_text, infix)
-            self.update_text_widget(self.prefix_text, prefix)
-            self.update_text_widget(self.postfix_text, postfix)
-            self.update_text_widget(self.tree_text, tree_repr)
+            self.show_notations(compiled)
             
             # Auto-plot in current tab
             current_tab = self.notebook.select()
@@ -477,12 +816,85 @@ class ExpressionPlotterGUI(ThemesAndAppear):
         except Exception as e:
             messagebox.showerror("Parse Error", f"Error parsing expression: {str(e)}")
     
+    def show_notations(self, compiled):
+        """Show the notations of a compiled expression"""
+        self.update_text_widget(self.infix_text, compiled.infix)
+        self.update_text_widget(self.prefix_text, compiled.prefix)
+        self.update_text_widget(self.postfix_text, compiled.postfix)
+        self.update_text_widget(self.tree_text, compiled.parse_tree)
+    
     def update_text_widget(self, widget, text):
         """Update text widget content"""
         widget.delete(1.0, END)
         widget.insert(1.0, text)
     
-    def plot_2d(self):
+    def submit_plot(self, channel, plotter, figure, canvas, compute, render):
+        """Compute samples on the worker thread, then draw them here"""
+        def draw(samples):
+            try:
+                render(samples)
+            except Exception as e:
+                plotter.plot_error(figure, e)
+            canvas.draw_idle()
+            self.show_grid_timing(plotter)
+        
+        def fail(error):
+            plotter.plot_error(figure, error)
+            canvas.draw_idle()
+        
+        self.worker.submit(channel, compute, draw, fail)
+    
+    def submit_progressive(self, channel, plotter, figure, canvas, compute,
+                           render):
+        """Draw a coarse surface first, then refine through the LOD stages
+        
+        Each stage is computed on the worker and drawn here. Refinement
+        stops at the point budget, or when the next stage would overrun the
+        time budget; its cost is extrapolated from the last two stages as a
+        fixed overhead plus a cost per point. A newer request on the channel
+        ends the chain.
+        """
+        stages = plotter.lod_stages
+        started = time.perf_counter()
+        timings = []
+        
+        def fail(error):
+            plotter.plot_error(figure, error)
+            canvas.draw_idle()
+        
+        def affordable(points):
+            elapsed = time.perf_counter() - started
+            if points > self.lod_point_budget:
+                return False
+            if len(timings) < 2:
+                return elapsed < self.lod_time_budget
+            (points_0, seconds_0), (points_1, seconds_1) = timings[-2:]
+            per_point = max(seconds_1 - seconds_0, 0) / (points_1 - points_0)
+            estimate = seconds_1 + per_point * (points - points_1)
+            return elapsed + estimate <= self.lod_time_budget
+        
+        def run(index):
+            stage_started = time.perf_counter()
+            
+            def draw(samples):
+                try:
+                    render(samples)
+                    canvas.draw()
+                except Exception as e:
+                    fail(e)
+                    return
+                self.show_grid_timing(plotter)
+                timings.append((stages[index] ** 2,
+                                time.perf_counter() - stage_started))
+                if index + 1 < len(stages) and affordable(stages[index + 1] ** 2):
+                    run(index + 1)
+            
+            self.worker.submit(channel, lambda: compute(stages[index]),
+                               draw, fail)
+        
+        run(0)
+    
+    def plot_2d(self, num_points=500):
         """Plot 2D function"""
         if not MATPLOTLIB_AVAILABLE:
             messagebox.showinfo("Info", "Matplotlib not available for plotting")
@@ -493,29 +905,46 @@ class ExpressionPlotterGUI(ThemesAndAppear):
             x_min = float(self.x_min_var.get())
             x_max = float(self.x_max_var.get())
             
-            plotter = Plotter2D()
-            plotter.plot(self.fig_2d, expression, x_min, x_max)
-            self.canvas_2d.draw()
+            adaptive = self.adaptive_2d_var.get()
+            plotter = self.plotter_2d
+            
+            self.submit_plot(
+                '2d', plotter, self.fig_2d, self.canvas_2d,
+                lambda: plotter.sample(expression, x_min, x_max,
+                                       num_points, adaptive),
+                lambda samples: plotter.render(self.fig_2d, expression,
+                                               samples, x_min, x_max,
+                                               adaptive))
             
         except Exception as e:
             messagebox.showerror("Plot Error", f"Error plotting 2D: {str(e)}")
     
-    def plot_3d(self):
-        """Plot 3D function"""
+    def plot_3d(self, num_points=None):
+        """Plot 3D function, progressively unless num_points is given"""
         if not MATPLOTLIB_AVAILABLE:
             messagebox.showinfo("Info", "Matplotlib not available for plotting")
             return
         
         try:
             expression = self.expr_3d_var.get().strip()
-            plotter = Plotter3D()
-            plotter.plot(self.fig_3d, expression)
-            self.canvas_3d.draw()
+            adaptive = self.adaptive_3d_var.get()
+            plotter = self.plotter_3d
+            compute = lambda n: plotter.sample(expression, num_points=n,
+                                               adaptive=adaptive)
+            render = lambda samples: plotter.render(self.fig_3d, expression,
+                                                    samples)
+            
+            if num_points is None:
+                self.submit_progressive('3d', plotter, self.fig_3d,
+                                        self.canvas_3d, compute, render)
+            else:
+                self.submit_plot('3d', plotter, self.fig_3d, self.canvas_3d,
+                                 lambda: compute(num_points), render)
             
         except Exception as e:
             messagebox.showerror("Plot Error", f"Error plotting 3D: {str(e)}")
     
-    def plot_polar(self):
+    def plot_polar(self, num_points=1000):
         """Plot polar function"""
         if not MATPLOTLIB_AVAILABLE:
             messagebox.showinfo("Info", "Matplotlib not available for plotting")
@@ -523,27 +952,60 @@ class ExpressionPlotterGUI(ThemesAndAppear):
         
         try:
             expression = self.expr_polar_var.get().strip()
-            plotter = PlotterPolar()
-            plotter.plot(self.fig_polar, expression)
-            self.canvas_polar.draw()
+            plotter = self.plotter_polar
+            
+            self.submit_plot(
+                'polar', plotter, self.fig_polar, self.canvas_polar,
+                lambda: plotter.sample(expression, num_points=num_points),
+                lambda samples: plotter.render(self.fig_polar, expression,
+                                               samples))
             
         except Exception as e:
             messagebox.showerror("Plot Error", f"Error plotting polar: {str(e)}")
     
-    def plot_spherical(self):
-        """Plot spherical function"""
+    def plot_spherical(self, num_points=None):
+        """Plot spherical function, progressively unless num_points is given"""
         if not MATPLOTLIB_AVAILABLE:
             messagebox.showinfo("Info", "Matplotlib not available for plotting")
             return
         
         try:
             expression = self.expr_spherical_var.get().strip()
-            plotter = PlotterSpherical()
-            plotter.plot(self.fig_spherical, expression)
-            self.canvas_spherical.draw()
+            plotter = self.plotter_spherical
+            compute = lambda n: plotter.sample(expression, num_points=n)
+            render = lambda samples: plotter.render(self.fig_spherical,
+                                                    expression, samples)
+            
+            if num_points is None:
+                self.submit_progressive('spherical', plotter,
+                                        self.fig_spherical,
+                                        self.canvas_spherical, compute, render)
+            else:
+                self.submit_plot('spherical', plotter, self.fig_spherical,
+                                 self.canvas_spherical,
+                                 lambda: compute(num_points), render)
             
         except Exception as e:
             messagebox.showerror("Plot Error", f"Error plotting spherical: {str(e)}")
+    
+    def plot_implicit(self, num_points=32):
+        """Plot implicit curve"""
+        if not MATPLOTLIB_AVAILABLE:
+            messagebox.showinfo("Info", "Matplotlib not available for plotting")
+            return
+        
+        try:
+            expression = self.expr_implicit_var.get().strip()
+            plotter = self.plotter_implicit
+            
+            self.submit_plot(
+                'implicit', plotter, self.fig_implicit, self.canvas_implicit,
+                lambda: plotter.sample(expression, num_points=num_points),
+                lambda samples: plotter.render(self.fig_implicit, expression,
+                                               samples))
+            
+        except Exception as e:
+            messagebox.showerror("Plot Error", f"Error plotting implicit: {str(e)}")
 
 
 def main():
@@ -551,10 +1013,24 @@ def main():
     root = Tk()
     app = ExpressionPlotterGUI(root)
     
+    # Show the window before loading matplotlib
+    root.update()
+    if startup_report:
+        startup_report.mark("first window")
+    app.setup_figures()
+    
     # Initial parse
     app.parse_and_plot(3)
+    if startup_report:
+        startup_report.mark("figures and first plot submitted")
+        startup_report.print()
     
     root.mainloop()
+    app.worker.shutdown()
+    if app.speech_session is not None:
+        app.speech_session.stop()
+    if 'Speech2Text' in sys.modules:
+        sys.modules['Speech2Text'].service().close()
     del root, app
 
 if __name__ == "__main__":
@@ -1,8 +1,12 @@
 from abc import ABC, abstractmethod
 from word2number import w2n
 import vosk
-import pyaudio
 import json
+import logging
+import os
+import queue
+import threading
+from collections import deque
 
 # Convert numerical words to mathematical expresions
 class WordsToMathX(ABC):
@@ -67,59 +71,253 @@ class EngToMathX(WordsToMathX):
         self.math_exp_v = buffer_v2
         return self.math_exp_v
 
-def main():  
-    # Set the model path vosk-model-small-fa-0.42
-    model_path_v = "_internal\\vosk-model-small-en-us-0.15"
-    # Initialize the model with model-path
-    vosk_model_v = vosk.Model(model_path_v)
-
-    # Create a recognizer
-    vosk_speech2text_v = vosk.KaldiRecognizer(vosk_model_v, 16000)
-
-    # Open the microphone stream
-    p = pyaudio.PyAudio()
-    stream = p.open(format = pyaudio.paInt16, channels = 1,
-                    rate = 16000, input = True,
-                    frames_per_buffer = 8192)
-
-    # Specify the path for the output text file
-    #out_file_path = "recognized_text.txt"
-
-    # list of converted audio to expresion
-    audi_to_tex_resul = []
-    
-    # Open a text file in write mode using a 'with' block
-    #with open(out_file_path, "wt", encoding = 'utf_8') as output_file:
-    print("Listening for speech. Say 'Terminate' to stop.")
-    # Start streaming and recognize speech
-    while True:
-        data = stream.read(4096) # Read in chunks of 4096 bytes
-        # Accept waveform of input voice
-        if vosk_speech2text_v.AcceptWaveform(data): 
-            # Parse the JSON result and get the recognized text
-            result = json.loads(vosk_speech2text_v.Result())
-            recognized_text = result['text']
-            # Check for the termination keyword
-            if ("terminate" in recognized_text.lower()) or \
-               ("ایست" in recognized_text):
-                print("Termination keyword detected. Stopping...")
-                break
-            print(f'\nBefore Processing: {recognized_text}')
-            engli_to_math_v = EngToMathX().sen_to_math_m # For shortness
-            recognized_text = engli_to_math_v(recognized_text)
-            # Write recognized text to the file
-            #output_file.write(recognized_text + "\n")
-            audi_to_tex_resul += [recognized_text]
-            print(f'\nAfter Processing: {recognized_text}')
+logger = logging.getLogger(__name__)
+
+# Set the model path vosk-model-small-fa-0.42
+MODEL_PATH = os.path.join("_internal", "vosk-model-small-en-us-0.15")
+SAMPLE_RATE = 16000
+
+# Spoken words that end a recording like the Stop button
+STOP_WORDS = ("terminate", "ایست")
+
+
+class AudioRing:
+    """Bounded FIFO of audio chunks between capture and recognition
+    
+    When the recognizer falls behind and the ring is full, the oldest
+    chunk is dropped and counted rather than blocking the capture thread.
+    """
+    
+    def __init__(self, capacity=32):
+        self.capacity = capacity
+        self.dropped = 0
+        self.high_water = 0
+        self.closed = False
+        self._chunks = deque()
+        self._ready = threading.Condition()
+    
+    def __len__(self):
+        return len(self._chunks)
+    
+    def put(self, chunk):
+        """Append chunk, dropping the oldest one when full"""
+        with self._ready:
+            if len(self._chunks) >= self.capacity:
+                self._chunks.popleft()
+                self.dropped += 1
+            self._chunks.append(chunk)
+            self.high_water = max(self.high_water, len(self._chunks))
+            self._ready.notify()
+    
+    def get(self, timeout=None):
+        """Oldest chunk, or None on timeout or once closed and drained"""
+        with self._ready:
+            if not self._chunks and not self.closed:
+                self._ready.wait(timeout)
+            return self._chunks.popleft() if self._chunks else None
+    
+    def close(self):
+        """No more chunks will come; wakes a waiting get()"""
+        with self._ready:
+            self.closed = True
+            self._ready.notify_all()
+
+
+class SpeechSession:
+    """One recording, captured and recognized off the caller's thread
+    
+    PortAudio calls _capture() on its own audio thread for every chunk,
+    which only appends it to the ring. A consumer thread feeds the ring to
+    the recognizer and reports through the events queue, as (kind, value)
+    pairs: ('partial', expression) while a phrase is being spoken,
+    ('result', expression) when one is final, ('error', exception) and
+    lastly ('done', expression). stop() ends capture; the audio already
+    buffered is still recognized.
+    """
+    
+    def __init__(self, service, chunk_frames=4096, capacity=32):
+        self.service = service
+        self.chunk_frames = chunk_frames
+        self.ring = AudioRing(capacity)
+        self.events = queue.Queue()
+        self.expression = ""
+        self.chunks = 0
+        self.overflows = 0
+        self._parts = []
+        self._stopping = threading.Event()
+        self._stream = None
+        self._thread = None
+    
+    def start(self):
+        """Open the microphone and start recognizing, returns self"""
+        import pyaudio
+        
+        service = self.service
+        service.load()
+        service.recognizer.Reset()
+        
+        # Open the microphone stream, chunks arrive in _capture
+        self._stream = service.audio().open(
+            format = pyaudio.paInt16, channels = 1,
+            rate = service.sample_rate, input = True,
+            frames_per_buffer = self.chunk_frames,
+            stream_callback = self._capture)
+        self._thread = threading.Thread(target=self._recognize,
+                                        name='speech-recognize', daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        """Stop capturing; buffered audio is still recognized"""
+        self._stopping.set()
+    
+    def stats(self):
+        """Counters showing whether recognition keeps up with real time"""
+        return {'chunks': self.chunks, 'overflows': self.overflows,
+                'dropped': self.ring.dropped,
+                'high_water': self.ring.high_water,
+                'capacity': self.ring.capacity}
+    
+    def _capture(self, data, frame_count, time_info, status):
+        """PortAudio thread: queue the chunk, count input overflows"""
+        import pyaudio
+        
+        if status & pyaudio.paInputOverflow:
+            self.overflows += 1
+        self.chunks += 1
+        self.ring.put(data)
+        return (None, pyaudio.paContinue)
+    
+    def _recognize(self):
+        """Consumer thread: feed buffered chunks to the recognizer"""
+        recognizer = self.service.recognizer
+        try:
+            while True:
+                if self._stopping.is_set() and not self.ring.closed:
+                    self._stream.stop_stream()
+                    self.ring.close()
+                
+                chunk = self.ring.get(timeout=0.1)
+                if chunk is None:
+                    if self.ring.closed:
+                        break
+                    continue
                 
-    # Stop and close the stream
-    stream.stop_stream()
-    stream.close()
+                # Accept waveform of input voice
+                if recognizer.AcceptWaveform(chunk):
+                    self._commit(json.loads(recognizer.Result())['text'])
+                else:
+                    partial = json.loads(recognizer.PartialResult())['partial']
+                    if partial:
+                        self.events.put(('partial', self.expression +
+                                         self.service.converter.sen_to_math_m(
+                                             partial)))
+            self._commit(json.loads(recognizer.FinalResult())['text'])
+        except Exception as e:
+            self.events.put(('error', e))
+        finally:
+            self._stream.close()
+            self.events.put(('done', self.expression))
+    
+    def _commit(self, recognized_text):
+        """Convert a final phrase and append it to the expression"""
+        if not recognized_text:
+            return
+        # Check for the termination keyword
+        if any(word in recognized_text.lower() for word in STOP_WORDS):
+            logger.info("Termination keyword detected. Stopping...")
+            self.stop()
+            return
+        logger.debug("Before processing: %s", recognized_text)
+        self._parts.append(self.service.converter.sen_to_math_m(
+            recognized_text))
+        self.expression = "".join(self._parts)
+        logger.debug("After processing: %s", self._parts[-1])
+        self.events.put(('result', self.expression))
+
+
+class SpeechService:
+    """Long-lived voice input: model, recognizer and converter load once
+    
+    load() reads the Vosk model from disk, which takes seconds, so the GUI
+    calls it on a background thread before the first recording. Every
+    session then reuses the same KaldiRecognizer after Reset(), the same
+    PyAudio instance and the same EngToMathX lookup tables.
+    """
+    
+    def __init__(self, model_path=MODEL_PATH, sample_rate=SAMPLE_RATE):
+        self.model_path = model_path
+        self.sample_rate = sample_rate
+        self.model = None
+        self.recognizer = None
+        self.converter = EngToMathX()
+        self._audio = None
+        self._lock = threading.Lock()
+    
+    def load(self):
+        """Load model and recognizer once, waiting on a load in progress"""
+        with self._lock:
+            if self.recognizer is None:
+                # Initialize the model with model-path
+                self.model = vosk.Model(self.model_path)
+                # Create a recognizer
+                self.recognizer = vosk.KaldiRecognizer(self.model,
+                                                       self.sample_rate)
+        return self
+    
+    def audio(self):
+        """The shared PyAudio instance"""
+        import pyaudio
+        
+        if self._audio is None:
+            self._audio = pyaudio.PyAudio()
+        return self._audio
+    
+    def start(self, chunk_frames=4096, capacity=32):
+        """Start a SpeechSession recording in the background"""
+        return SpeechSession(self, chunk_frames, capacity).start()
+    
+    def listen(self):
+        """Record until 'terminate' is said, returns the expression"""
+        session = self.start()
+        print("Listening for speech. Say 'Terminate' to stop.")
+        error = None
+        try:
+            while True:
+                kind, value = session.events.get()
+                if kind == 'error':
+                    error = value
+                elif kind == 'done':
+                    break
+        finally:
+            session.stop()
+        
+        if error is not None:
+            raise error
+        return value
+    
+    def close(self):
+        """Terminate the PyAudio object; the model stays loaded"""
+        if self._audio is not None:
+            self._audio.terminate()
+            self._audio = None
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def service():
+    """The shared SpeechService, created on first use"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = SpeechService()
+        return _service
 
-    # Terminate the PyAudio object
-    p.terminate()
 
-    return "".join(audi_to_tex_resul)
+def main():
+    return service().listen()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Offline transcription of recorded dictations to expressions
+Streams mono 16-bit WAV files through the Vosk recognizer, no microphone
+or audio device needed, and writes one JSON line per file.
+Run with: python batch_transcribe.py [-j WORKERS] FILE_OR_DIR...
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Frames per read; large chunks keep the per-call overhead low
+CHUNK_FRAMES = 64000
+
+_service = None
+_recognizers = {}
+
+
+def _init_worker(model_path):
+    """Load the model once per worker process"""
+    global _service
+    from Speech2Text import SpeechService
+    _service = SpeechService(model_path).load()
+    _recognizers[_service.sample_rate] = _service.recognizer
+
+
+def _recognizer(sample_rate):
+    """Recognizer for sample_rate, reset and reused across files"""
+    import vosk
+    
+    recognizer = _recognizers.get(sample_rate)
+    if recognizer is None:
+        recognizer = _recognizers[sample_rate] = vosk.KaldiRecognizer(
+            _service.model, sample_rate)
+    else:
+        recognizer.Reset()
+    return recognizer
+
+
+def transcribe_file(path, chunk_frames=CHUNK_FRAMES):
+    """Transcribe one WAV file, returning a dict for the JSON line
+    
+    Needs the model of _init_worker(). Each final phrase is converted by
+    EngToMathX.sen_to_math_m and the parts joined, as during live input.
+    real_time_factor is processing time over audio duration.
+    """
+    started = time.perf_counter()
+    record = {'file': path}
+    try:
+        with wave.open(path, 'rb') as audio:
+            if audio.getnchannels() != 1 or audio.getsampwidth() != 2:
+                raise ValueError("expected mono 16-bit PCM WAV")
+            sample_rate = audio.getframerate()
+            frames = audio.getnframes()
+            recognizer = _recognizer(sample_rate)
+            
+            phrases = []
+            while True:
+                data = audio.readframes(chunk_frames)
+                if not data:
+                    break
+                if recognizer.AcceptWaveform(data):
+                    phrases.append(json.loads(recognizer.Result())['text'])
+            phrases.append(json.loads(recognizer.FinalResult())['text'])
+        
+        phrases = [phrase for phrase in phrases if phrase]
+        # The converter prints its progress; keep stdout for JSON lines
+        with contextlib.redirect_stdout(io.StringIO()):
+            parts = [_service.converter.sen_to_math_m(phrase)
+                     for phrase in phrases]
+        
+        record['text'] = " ".join(phrases)
+        record['expression'] = "".join(parts)
+        record['audio_seconds'] = frames / sample_rate
+    except Exception as e:
+        record['error'] = f"{type(e).__name__}: {e}"
+    
+    seconds = time.perf_counter() - started
+    record['seconds'] = round(seconds, 4)
+    if record.get('audio_seconds'):
+        record['real_time_factor'] = round(seconds / record['audio_seconds'],
+                                           4)
+    return record
+
+
+def wav_files(paths):
+    """Expand directories to the .wav files in them, sorted"""
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith('.wav'):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+
+def transcribe(paths, workers=None, model_path=None,
+               chunk_frames=CHUNK_FRAMES):
+    """Yield a record per WAV file in order, transcribed in worker processes
+    
+    Every worker loads the model once; files are handed out one at a time
+    so a long dictation does not hold up a batch of short ones. Raises
+    FileNotFoundError for a missing model directory, and BrokenProcessPool
+    if the workers cannot load the model.
+    """
+    from Speech2Text import MODEL_PATH
+    
+    model_path = model_path or MODEL_PATH
+    if not os.path.isdir(model_path):
+        raise FileNotFoundError(f"Vosk model directory not found: "
+                                f"{model_path}")
+    paths = list(wav_files(paths))
+    workers = min(workers or os.cpu_count() or 1, max(len(paths), 1))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(model_path,)) as pool:
+        yield from pool.map(transcribe_file, paths,
+                            [chunk_frames] * len(paths))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Transcribe WAV dictations to expressions as JSON lines")
+    parser.add_argument('paths', nargs='+', metavar='FILE_OR_DIR')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="worker processes (default: CPU count)")
+    parser.add_argument('-m', '--model', default=None,
+                        help="Vosk model directory")
+    parser.add_argument('-o', '--output', default=None,
+                        help="JSON lines file (default: stdout)")
+    parser.add_argument('--chunk-frames', type=int, default=CHUNK_FRAMES)
+    args = parser.parse_args(argv)
+    
+    output = open(args.output, 'w', encoding='utf-8') if args.output \
+             else sys.stdout
+    failed = 0
+    try:
+        for record in transcribe(args.paths, args.workers, args.model,
+                                 args.chunk_frames):
+            failed += 'error' in record
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            output.flush()
+    except FileNotFoundError as e:
+        print(f"batch_transcribe: {e}", file=sys.stderr)
+        return 2
+    except BrokenProcessPool:
+        print("batch_transcribe: the workers could not load the speech "
+              "model", file=sys.stderr)
+        return 2
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
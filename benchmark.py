@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for expression evaluation and plotting
+Run with: python benchmark.py
+"""
+
+import math
+import os
+import random
+import re
+import timeit
+import tracemalloc
+
+from expression_parser import CompiledExpression, ExpressionParser, tree_size
+
+
+def legacy_evaluate(parser, expression, variables):
+    """Per-point string rewriting and eval, as evaluate_expression used to do"""
+    expr = parser.normalize_expression(expression)
+    for var, value in variables.items():
+        expr = expr.replace(var, str(value))
+    expr = expr.replace('sin', 'math.sin')
+    expr = expr.replace('cos', 'math.cos')
+    expr = expr.replace('tan', 'math.tan')
+    expr = expr.replace('log', 'math.log10')
+    expr = expr.replace('ln', 'math.log')
+    expr = expr.replace('sqrt', 'math.sqrt')
+    expr = expr.replace('exp', 'math.exp')
+    expr = expr.replace('abs', 'math.fabs')
+    expr = expr.replace('^', '**')
+    return eval(expr, {"__builtins__": {}, "math": math})
+
+
+def legacy_tokenize(expression):
+    """Regex normalization plus character walk, as tokenize used to do"""
+    expression = expression.replace(' ', '')
+    expression = expression.replace('**', '^')
+    expression = re.sub(r'(\d)([a-zA-Z])', r'\1*\2', expression)
+    expression = re.sub(r'([a-zA-Z])(\d)', r'\1*\2', expression)
+    expression = re.sub(r'(\))(\()', r'\1*\2', expression)
+    expression = re.sub(r'(\d)(\()', r'\1*\2', expression)
+    expression = re.sub(r'(\))([a-zA-Z])', r'\1*\2', expression)
+
+    tokens = []
+    i = 0
+    while i < len(expression):
+        if expression[i].isdigit() or expression[i] == '.':
+            num = ''
+            while i < len(expression) and (expression[i].isdigit() or
+                                           expression[i] == '.'):
+                num += expression[i]
+                i += 1
+            tokens.append(num)
+        elif expression[i].isalpha():
+            name = ''
+            while i < len(expression) and (expression[i].isalnum() or
+                                           expression[i] == '_'):
+                name += expression[i]
+                i += 1
+            tokens.append(name)
+        else:
+            tokens.append(expression[i])
+            i += 1
+    return tokens
+
+
+def generate_expression(terms, seed=0):
+    """Long machine-generated expression in x and y"""
+    rng = random.Random(seed)
+    functions = ['sin', 'cos', 'tan', 'log', 'ln', 'sqrt', 'exp', 'abs']
+    parts = []
+    for _ in range(terms):
+        coefficient = f"{rng.uniform(0.1, 99):.3f}"
+        variable = rng.choice('xy')
+        parts.append(f"{coefficient}{rng.choice(functions)}"
+                     f"({variable}^{rng.randint(1, 5)})")
+    return ' + '.join(parts)
+
+
+def report(label, seconds, count, unit="point"):
+    """Print a timing line in microseconds per unit"""
+    print(f"  {label:<28}{seconds / count * 1e6:10.2f} us/{unit}")
+
+
+def bench_scalar_evaluation(points=2000):
+    """Per-point cost of legacy string eval versus compiled expressions"""
+    print("Scalar evaluation (per point)")
+    parser = ExpressionParser()
+    samples = [-10 + 20 * i / points for i in range(points)]
+
+    for expression in ("x^2 + 2*x + 1", "sin(x)*cos(x) + sqrt(abs(x))"):
+        print(f" {expression}")
+        legacy = timeit.timeit(
+            lambda: [legacy_evaluate(parser, expression, {'x': x})
+                     for x in samples], number=1)
+        report("legacy string eval", legacy, points)
+
+        cached = timeit.timeit(
+            lambda: [parser.evaluate_expression(expression, {'x': x})
+                     for x in samples], number=1)
+        report("evaluate_expression", cached, points)
+
+        compiled = parser.compile(expression)
+        direct = timeit.timeit(
+            lambda: [compiled.evaluate({'x': x}) for x in samples], number=1)
+        report("CompiledExpression", direct, points)
+
+
+def bench_vector_evaluation(size=200):
+    """Per-point loop versus one NumPy call over a size x size surface"""
+    import numpy as np
+
+    print(f"Surface evaluation ({size}x{size})")
+    parser = ExpressionParser()
+    X, Y = np.meshgrid(np.linspace(-5, 5, size), np.linspace(-5, 5, size))
+
+    for expression in ("x^2 + y^2", "sin(x)*cos(y) + exp(-x^2)"):
+        print(f" {expression}")
+        compiled = parser.compile(expression)
+
+        def loop():
+            Z = np.zeros_like(X)
+            for index in np.ndindex(X.shape):
+                Z[index] = compiled.evaluate({'x': X[index], 'y': Y[index]})
+            return Z
+
+        looped = timeit.timeit(loop, number=1)
+        report("scalar loop", looped, 1, "surface")
+
+        vectorized = min(timeit.repeat(
+            lambda: compiled.evaluate_array({'x': X, 'y': Y}),
+            number=1, repeat=5))
+        report("evaluate_array", vectorized, 1, "surface")
+
+
+def bench_tokenizer(terms=2000):
+    """Tokenizer throughput on a long generated expression"""
+    print(f"Tokenizer throughput ({terms} terms)")
+    parser = ExpressionParser()
+    expression = generate_expression(terms)
+    count = len(parser.tokenize(expression))
+
+    legacy = min(timeit.repeat(lambda: legacy_tokenize(expression),
+                               number=1, repeat=5))
+    print(f"  {'legacy normalize+tokenize':<28}{count / legacy:12,.0f} tokens/s")
+
+    scanner = min(timeit.repeat(lambda: parser.tokenize(expression),
+                                number=1, repeat=5))
+    print(f"  {'regex scanner':<28}{count / scanner:12,.0f} tokens/s")
+
+
+def bench_optimizer(size=500):
+    """Nodes eliminated by the optimizer and the effect on surface time"""
+    import numpy as np
+
+    print(f"AST optimizer (nodes eliminated, {size}x{size} evaluation)")
+    parser = ExpressionParser()
+    corpus = ["x^2 + 2*x + 1", "x^2 + y^2", "2*x*2*x",
+              "((sin(x)*abs(cos(x))^0.5)/(sin(x)+7/5))-2*sin(x)+2",
+              "1 + 0.3*cos(5*y)*sin(3*x)", "sin(x)*cos(y) + exp(-x^2)",
+              generate_expression(20)]
+    X, Y = np.meshgrid(np.linspace(-5, 5, size), np.linspace(-5, 5, size))
+
+    before = after = 0
+    for expression in corpus:
+        compiled = parser.compile(expression)
+        plain = CompiledExpression(expression, compiled.normalized,
+                                   compiled.tree, optimize_tree=False)
+        nodes = tree_size(compiled.tree)
+        before += nodes
+        after += nodes - compiled.eliminated
+
+        times = [min(timeit.repeat(
+            lambda: version.evaluate_array({'x': X, 'y': Y}),
+            number=1, repeat=3)) for version in (plain, compiled)]
+        label = expression if len(expression) <= 27 else expression[:24] + "..."
+        print(f"  {label:<28}{nodes:5d} -> {nodes - compiled.eliminated:<5d}"
+              f"{times[0] * 1e3:8.1f} -> {times[1] * 1e3:.1f} ms")
+    print(f"  {'corpus total':<28}{before:5d} -> {after:<5d}"
+          f"({before - after} eliminated)")
+
+
+def bench_grid_memory(size=2000):
+    """Peak memory and time of a meshgrid evaluation versus row tiles"""
+    import numpy as np
+    from grid_evaluator import GridEvaluator
+
+    print(f"Grid evaluation ({size}x{size}, peak memory)")
+    parser = ExpressionParser()
+    compiled = parser.compile("sin(x)*cos(y) + exp(-x^2)")
+    x = np.linspace(-5, 5, size)
+
+    def meshgrid():
+        X, Y = np.meshgrid(x, x)
+        return compiled.evaluate_array({'x': X, 'y': Y})
+
+    cases = [("full meshgrid", meshgrid)]
+    for dtype in ('float64', 'float32'):
+        evaluator = GridEvaluator(max_bytes=16 * 1024 * 1024, dtype=dtype)
+        cases.append((f"row tiles {dtype}",
+                      lambda evaluator=evaluator:
+                      evaluator.evaluate(compiled, 'x', x, 'y', x)))
+
+    for label, evaluate in cases:
+        tracemalloc.start()
+        seconds = timeit.timeit(evaluate, number=1)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"  {label:<28}{seconds * 1e3:10.1f} ms {peak / 2**20:8.1f} MiB")
+
+
+def bench_process_scaling(size=2000, max_workers=None):
+    """Grid evaluation time on 1 to N worker processes"""
+    import numpy as np
+    from grid_evaluator import (GridEvaluator, ProcessGridEvaluator,
+                                shutdown_pools)
+
+    max_workers = max_workers or os.cpu_count() or 1
+    print(f"Process pool scaling ({size}x{size}, {max_workers} cores)")
+    parser = ExpressionParser()
+    compiled = parser.compile("sin(x)*cos(y) + exp(-x^2) + sqrt(abs(x*y))")
+    x = np.linspace(-5, 5, size)
+
+    single = min(timeit.repeat(
+        lambda: GridEvaluator().evaluate(compiled, 'x', x, 'y', x),
+        number=1, repeat=3))
+    print(f"  {'in-process':<28}{single * 1e3:10.1f} ms")
+
+    for workers in range(1, max_workers + 1):
+        evaluator = ProcessGridEvaluator(workers)
+        # First call pays for starting the pool
+        evaluator.evaluate(compiled, 'x', x, 'y', x)
+        seconds = min(timeit.repeat(
+            lambda: evaluator.evaluate(compiled, 'x', x, 'y', x),
+            number=1, repeat=3))
+        print(f"  {f'{workers} worker(s)':<28}{seconds * 1e3:10.1f} ms"
+              f" {single / seconds:6.2f}x")
+    shutdown_pools()
+
+
+def bench_thread_blocks(size=2000, max_workers=None):
+    """Row tiles versus thread-pool blocks with out= scratch buffers"""
+    import numpy as np
+    from grid_evaluator import GridEvaluator, ThreadGridEvaluator
+
+    max_workers = max_workers or os.cpu_count() or 1
+    print(f"Thread block evaluation ({size}x{size}, {max_workers} cores)")
+    parser = ExpressionParser()
+    compiled = parser.compile("sin(x)*cos(y) + exp(-x^2)")
+    x = np.linspace(-5, 5, size)
+
+    cases = [("row tiles", GridEvaluator())]
+    cases += [(f"{workers} thread(s)", ThreadGridEvaluator(workers))
+              for workers in range(1, max_workers + 1)]
+    for label, evaluator in cases:
+        evaluator.evaluate(compiled, 'x', x, 'y', x)
+        seconds = min(timeit.repeat(
+            lambda: evaluator.evaluate(compiled, 'x', x, 'y', x),
+            number=1, repeat=3))
+        tracemalloc.start()
+        evaluator.evaluate(compiled, 'x', x, 'y', x)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"  {label:<28}{seconds * 1e3:10.1f} ms {peak / 2**20:8.1f} MiB")
+
+
+def bench_backends(sizes=(100, 500, 1000, 2000)):
+    """Surface sampling time and the backend Plotter3D picks per grid size"""
+    from grid_evaluator import numba_available
+    from plotters import Plotter3D, sample_cache
+
+    print(f"Grid backends (Numba {'available' if numba_available() else 'not installed'})")
+    plotter = Plotter3D()
+    expression = "sin(x)*cos(y) + exp(-x^2) + sqrt(abs(x*y))"
+    for size in sizes:
+        # First call may pay for JIT compilation; time the second
+        for _ in range(2):
+            sample_cache.clear()
+            plotter.sample(expression, num_points=size)
+        backend, points, seconds = plotter.grid_timing
+        print(f"  {f'{size}x{size}':<28}{seconds * 1e3:10.1f} ms  {backend}")
+
+
+def bench_interval_pruning(num_points=500):
+    """Useful samples with and without interval pruning, and y-limit cost"""
+    import numpy as np
+    from plotters import Plotter2D
+
+    print(f"Interval pruning ({num_points} points, defined samples)")
+    plotter = Plotter2D()
+    for expression, x_min, x_max in (("sqrt(1-x^2)", -100, 100),
+                                     ("ln(x) + sqrt(4-x)", -50, 50),
+                                     ("tan(x)", -10, 10)):
+        x_values = np.linspace(x_min, x_max, num_points)
+        uniform = np.isfinite(plotter.safe_eval_array(
+            expression, {'x': x_values})).sum()
+        pruned = np.isfinite(plotter.sample(expression, x_min, x_max,
+                                            num_points, cache=False)[1]).sum()
+        seconds = timeit.timeit(
+            lambda: plotter.y_limits(expression, x_min, x_max), number=1)
+        print(f"  {expression:<28}{uniform:5d} -> {pruned:<5d}"
+              f"y limits in {seconds * 1e3:.1f} ms")
+
+
+def bench_implicit(coarse=32, depth=4):
+    """Quadtree marching squares versus a dense grid of equal resolution"""
+    from plotters import PlotterImplicit
+
+    size = coarse * 2 ** depth
+    print(f"Implicit curves (evaluations, {size}x{size} effective grid)")
+    plotter = PlotterImplicit()
+    for relation in ("x^2 + y^2 = 4", "(x^2 + y^2)^2 = 4*(x^2 - y^2)",
+                     "sin(x) = cos(y)"):
+        for intervals in (False, True):
+            seconds = timeit.timeit(
+                lambda: plotter.sample(relation, num_points=coarse,
+                                       depth=depth, intervals=intervals),
+                number=1)
+            label = f"{relation[:20]}{' +intervals' if intervals else ''}"
+            print(f"  {label:<32}{plotter.evaluations:8d} vs "
+                  f"{(size + 1) ** 2} {seconds * 1e3:8.1f} ms")
+
+
+def bench_adaptive_mesh(expression="1/(x^2+y^2+0.1)", probes=20000):
+    """Adaptive triangulated mesh versus uniform grids, by worst error"""
+    import numpy as np
+    from matplotlib.tri import LinearTriInterpolator, Triangulation
+    from plotters import Plotter3D
+
+    print(f"3D surface of {expression} (vertices, max error at "
+          f"{probes} random points)")
+    plotter = Plotter3D()
+    function = lambda x, y: plotter.safe_eval_array(expression,
+                                                    {'x': x, 'y': y})
+    probe_x, probe_y = np.random.default_rng(0).uniform(-5, 5, (2, probes))
+    exact = function(probe_x, probe_y)
+
+    def worst_error(x, y, z, triangles=None):
+        interpolate = LinearTriInterpolator(Triangulation(x, y, triangles), z)
+        return np.max(np.abs(interpolate(probe_x, probe_y) - exact))
+
+    for size in (128, 256, 500):
+        seconds = timeit.timeit(
+            lambda: plotter.sample(expression, num_points=size), number=1)
+        X, Y, Z = plotter.sample(expression, num_points=size)
+        print(f"  uniform {size}x{size:<19}{Z.size:8d} "
+              f"{worst_error(X.ravel(), Y.ravel(), Z.ravel()):10.4f} "
+              f"{seconds * 1e3:8.1f} ms")
+
+    for max_vertices in (2000, 8000, 20000):
+        plotter.mesh_max_vertices = max_vertices
+        seconds = timeit.timeit(
+            lambda: plotter.sample(expression, num_points=512, adaptive=True),
+            number=1)
+        x, y, z, triangles = plotter.sample(expression, num_points=512,
+                                            adaptive=True)
+        print(f"  adaptive, cap {max_vertices:<17}{z.size:8d} "
+              f"{worst_error(x, y, z, triangles):10.4f} "
+              f"{seconds * 1e3:8.1f} ms")
+
+
+def bench_replot(repeat=10):
+    """Frame time of a replot: rebuilt figure versus in-place update"""
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from plotters import Plotter2D, Plotter3D, PlotterPolar, PlotterSpherical
+
+    print("Replot frame time (plot + draw, samples cached)")
+    cases = [(Plotter2D, ("sin(x)", "cos(x)")),
+             (Plotter3D, ("x^2 + y^2", "sin(x)*cos(y)")),
+             (PlotterPolar, ("1 + sin(t)", "2*cos(3*t)")),
+             (PlotterSpherical, ("1", "1 + 0.3*cos(5*phi)*sin(3*theta)"))]
+
+    for plotter_class, expressions in cases:
+        print(f" {plotter_class.__name__}")
+        figure = Figure(figsize=(5, 3), dpi=100)
+        FigureCanvasAgg(figure)
+
+        def frame(plotter, index):
+            plotter.plot(figure, expressions[index % 2])
+            figure.canvas.draw()
+
+        # Fresh plotter every time, as the GUI used to do
+        frame(plotter_class(), 0)
+        rebuilt = timeit.timeit(
+            lambda: [frame(plotter_class(), i) for i in range(repeat)],
+            number=1)
+        report("figure.clear() rebuild", rebuilt, repeat, "frame")
+
+        plotter = plotter_class()
+        frame(plotter, 0)
+        updated = timeit.timeit(
+            lambda: [frame(plotter, i) for i in range(repeat)], number=1)
+        report("in-place artist update", updated, repeat, "frame")
+
+
+def main():
+    bench_scalar_evaluation()
+    bench_vector_evaluation()
+    bench_tokenizer()
+    bench_optimizer()
+    bench_grid_memory()
+    bench_process_scaling()
+    bench_thread_blocks()
+    bench_backends()
+    bench_interval_pruning()
+    bench_implicit()
+    bench_adaptive_mesh()
+    bench_replot()
+
+
+if __name__ == "__main__":
+    main()
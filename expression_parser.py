@@ -5,10 +5,81 @@ Handles conversion between infix, prefix, and postfix notations
 
 import re
 import math
+import threading
+from collections import OrderedDict
+
+
+# Scalar implementations of the supported functions
+MATH_FUNCTIONS = {
+    'sin': math.sin, 'cos': math.cos, 'tan': math.tan,
+    'log': math.log10, 'ln': math.log, 'sqrt': math.sqrt,
+    'exp': math.exp, 'abs': math.fabs
+}
+
+
+def numpy_functions():
+    """NumPy ufunc equivalents of MATH_FUNCTIONS (imported on first use)"""
+    import numpy as np
+    return {
+        'sin': np.sin, 'cos': np.cos, 'tan': np.tan,
+        'log': np.log10, 'ln': np.log, 'sqrt': np.sqrt,
+        'exp': np.exp, 'abs': np.abs
+    }
+
+
+class ExpressionCache:
+    """Size-bounded LRU of CompiledExpression keyed on normalized text"""
+    
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def get(self, key):
+        """Return cached entry and mark it most recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return entry
+    
+    def put(self, key, entry):
+        """Store entry, evicting the least recently used beyond maxsize"""
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        """Drop all entries and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+    
+    def stats(self):
+        """Counters for sizing the cache"""
+        return {'size': len(self._entries), 'maxsize': self.maxsize,
+                'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions}
+
+
+# Shared by every ExpressionParser, so recreated plotters reuse compilations
+expression_cache = ExpressionCache()
 
 
 class ExpressionParser:
-    def __init__(self):
+    def __init__(self, cache=None):
         # Operator precedence (higher number = higher precedence)
         self.precedence = {
             '+': 1, '-': 1,
@@ -24,132 +95,69 @@ class ExpressionParser:
         
         # Functions that take one argument
         self.functions = {'sin', 'cos', 'tan', 'log', 'ln', 'sqrt', 'exp', 'abs'}
+        
+        # Compiled expressions keyed on normalized text
+        self.cache = expression_cache if cache is None else cache
     
     def normalize_expression(self, expression):
         """Normalize expression for consistent parsing"""
-        # Replace common patterns
-        expression = expression.replace(' ', '')
-        expression = expression.replace('**', '^')
-        
-        # Add multiplication signs where needed
-        expression = re.sub(r'(\d)([a-zA-Z])', r'\1*\2', expression)  # 2x -> 2*x
-        expression = re.sub(r'([a-zA-Z])(\d)', r'\1*\2', expression)  # x2 -> x*2
-        expression = re.sub(r'(\))(\()', r'\1*\2', expression)        # )( -> )*(
-        expression = re.sub(r'(\d)(\()', r'\1*\2', expression)        # 2( -> 2*(
-        expression = re.sub(r'(\))([a-zA-Z])', r'\1*\2', expression)  # )x -> )*x
-        
-        return expression
+        return normalized_text(self.tokenize(expression))
     
     def tokenize(self, expression):
-        """Tokenize expression into operators, operands, and functions"""
+        """Tokenize expression into Token records in one regex pass
+        
+        Inserts the implicit multiplications of 2x, x2, 2(, )( and )x and
+        rewrites ** as ^ on the way.
+        """
         tokens = []
-        i = 0
+        append = tokens.append
+        functions = self.functions
+        # Whether the last token can take an implicit '*' after it
+        ends_operand = False
         
-        while i < len(expression):
-            if expression[i].isspace():
-                i += 1
-                continue
-            
-            # Numbers (including decimals)
-            if expression[i].isdigit() or expression[i] == '.':
-                num = ''
-                while i < len(expression) and (expression[i].isdigit() or expression[i] == '.'):
-                    num += expression[i]
-                    i += 1
-                tokens.append(num)
+        for match in _TOKEN_PATTERN.finditer(expression):
+            kind = match.lastgroup
+            if kind == 'space':
                 continue
+            text = match.group()
             
-            # Functions and variables
-            if expression[i].isalpha():
-                name = ''
-                while i < len(expression) and (expression[i].isalnum() or expression[i] == '_'):
-                    name += expression[i]
-                    i += 1
-                tokens.append(name)
+            if kind == 'op':
+                append(Token(kind, '^' if text == '**' else text,
+                             match.start()))
+                ends_operand = False
                 continue
+            if kind == 'error':
+                raise ValueError(f"Cannot parse expression: unexpected "
+                                 f"'{text}' at position {match.start()}")
             
-            # Two-character operators
-            if i < len(expression) - 1:
-                two_char = expression[i:i+2]
-                if two_char in self.precedence:
-                    tokens.append(two_char)
-                    i += 2
-                    continue
-            
-            # Single character operators and parentheses
-            tokens.append(expression[i])
-            i += 1
+            if kind == 'number' and tokens and tokens[-1].kind == 'number':
+                # 3.5.2 or 2 3; a second number is no implicit product
+                raise ValueError(f"Cannot parse expression: unexpected "
+                                 f"'{text}' at position {match.start()}")
+            if ends_operand and kind != 'rparen':
+                append(Token('op', '*', match.start()))
+            append(Token(kind, text, match.start()))
+            ends_operand = kind != 'lparen' and text not in functions
         
         return tokens
     
+    def parse(self, expression):
+        """Parse expression into a tree of Node objects"""
+        return self._parse_tokens(self.tokenize(expression))
+    
+    def _parse_tokens(self, tokens):
+        """Parse an already tokenized expression"""
+        if not tokens:
+            raise ValueError("Cannot parse expression: empty expression")
+        return _TreeBuilder(self, tokens).build()
+    
     def infix_to_postfix(self, expression):
-        """Convert infix to postfix using Shunting Yard algorithm"""
-        tokens = self.tokenize(expression)
-        output = []
-        operator_stack = []
-        
-        for token in tokens:
-            # Operand (number or variable)
-            if self.is_operand(token):
-                output.append(token)
-            
-            # Function
-            elif token in self.functions:
-                operator_stack.append(token)
-            
-            # Left parenthesis
-            elif token == '(':
-                operator_stack.append(token)
-            
-            # Right parenthesis
-            elif token == ')':
-                while operator_stack and operator_stack[-1] != '(':
-                    output.append(operator_stack.pop())
-                if operator_stack and operator_stack[-1] == '(':
-                    operator_stack.pop()  # Remove the '('
-                # If there's a function on top of stack, pop it
-                if operator_stack and operator_stack[-1] in self.functions:
-                    output.append(operator_stack.pop())
-            
-            # Operator
-            elif token in self.precedence:
-                while (operator_stack and 
-                       operator_stack[-1] != '(' and
-                       operator_stack[-1] in self.precedence and
-                       (self.precedence[operator_stack[-1]] > self.precedence[token] or
-                        (self.precedence[operator_stack[-1]] == self.precedence[token] and 
-                         token not in self.right_associative))):
-                    output.append(operator_stack.pop())
-                operator_stack.append(token)
-        
-        # Pop remaining operators
-        while operator_stack:
-            output.append(operator_stack.pop())
-        
-        return ' '.join(output)
+        """Convert infix to postfix"""
+        return to_postfix(self.parse(expression))
     
     def infix_to_prefix(self, expression):
         """Convert infix to prefix"""
-        # Reverse the expression
-        tokens = self.tokenize(expression)
-        tokens.reverse()
-        
-        # Swap parentheses
-        for i in range(len(tokens)):
-            if tokens[i] == '(':
-                tokens[i] = ')'
-            elif tokens[i] == ')':
-                tokens[i] = '('
-        
-        # Get postfix of reversed expression
-        reversed_expr = ''.join(tokens)
-        postfix = self.infix_to_postfix(reversed_expr)
-        
-        # Reverse the result
-        prefix_tokens = postfix.split()
-        prefix_tokens.reverse()
-        
-        return ' '.join(prefix_tokens)
+        return to_prefix(self.parse(expression))
     
     def is_operand(self, token):
         """Check if token is an operand (number or variable)"""
@@ -162,62 +170,779 @@ class ExpressionParser:
     def get_parse_tree_representation(self, expression):
         """Get a simple text representation of the parse tree"""
         try:
-            postfix = self.infix_to_postfix(expression)
-            tokens = postfix.split()
-            
-            if not tokens:
+            if not self.tokenize(expression):
                 return "Empty expression"
-            
-            # Build tree representation using stack
-            stack = []
-            
-            for token in tokens:
-                if self.is_operand(token):
-                    stack.append(token)
-                elif token in self.functions:
-                    if stack:
-                        operand = stack.pop()
-                        stack.append(f"{token}({operand})")
-                elif token in self.precedence:
-                    if len(stack) >= 2:
-                        right = stack.pop()
-                        left = stack.pop()
-                        stack.append(f"({left} {token} {right})")
-                    elif len(stack) == 1 and token in ['+', '-']:
-                        # Unary operator
-                        operand = stack.pop()
-                        stack.append(f"({token}{operand})")
-            
-            return stack[0] if stack else "Invalid expression"
+            return to_tree(self.parse(expression))
             
         except Exception as e:
             return f"Error building parse tree: {str(e)}"
     
+    def compile(self, expression):
+        """Compile expression once into a reusable CompiledExpression"""
+        tokens = self.tokenize(expression)
+        normalized = normalized_text(tokens)
+        compiled = self.cache.get(normalized)
+        if compiled is None:
+            try:
+                compiled = CompiledExpression(expression, normalized,
+                                              self._parse_tokens(tokens))
+            except RecursionError:
+                raise ValueError("Cannot parse expression: nested too "
+                                 "deeply")
+            self.cache.put(normalized, compiled)
+        return compiled
+    
     def evaluate_expression(self, expression, variables=None):
         """Evaluate expression with given variables"""
+        return self.compile(expression).evaluate(variables)
+    
+    def kernel_source(self, expression, x_name='x', y_name='y'):
+        """Python source of an element-wise grid loop for expression"""
+        return self.compile(expression).kernel_source(x_name, y_name)
+
+
+# One alternative per token kind, tried left to right at each offset
+_TOKEN_PATTERN = re.compile(r"""
+    (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+  | (?P<name>[A-Za-z_]+)
+  | (?P<op>\*\*|[-+*/%^])
+  | (?P<lparen>\()
+  | (?P<rparen>\))
+  | (?P<space>\s+)
+  | (?P<error>.)
+""", re.VERBOSE)
+
+
+class Token:
+    """Token text with its kind and offset in the source expression"""
+    __slots__ = ('kind', 'text', 'position')
+    
+    def __init__(self, kind, text, position):
+        self.kind = kind
+        self.text = text
+        self.position = position
+    
+    def __repr__(self):
+        return f"Token({self.kind!r}, {self.text!r}, {self.position})"
+
+
+def normalized_text(tokens):
+    """Join tokens back into the normalized expression text"""
+    return ''.join(token.text for token in tokens)
+
+
+class Node:
+    """Base class for parse tree nodes"""
+    __slots__ = ()
+
+
+class Number(Node):
+    """Numeric literal"""
+    __slots__ = ('text', 'value')
+    
+    def __init__(self, text):
+        self.text = text
+        self.value = float(text)
+
+
+class Variable(Node):
+    """Named variable such as x, y, t, theta or phi"""
+    __slots__ = ('name',)
+    
+    def __init__(self, name):
+        self.name = name
+
+
+class UnaryOp(Node):
+    """Prefix minus"""
+    __slots__ = ('op', 'operand')
+    
+    def __init__(self, op, operand):
+        self.op = op
+        self.operand = operand
+
+
+class BinaryOp(Node):
+    """Binary operator with left and right operands"""
+    __slots__ = ('op', 'left', 'right')
+    
+    def __init__(self, op, left, right):
+        self.op = op
+        self.left = left
+        self.right = right
+
+
+class FunctionCall(Node):
+    """One-argument function such as sin or sqrt"""
+    __slots__ = ('name', 'argument')
+    
+    def __init__(self, name, argument):
+        self.name = name
+        self.argument = argument
+
+
+class _TreeBuilder:
+    """Recursive descent parser turning one token list into a tree"""
+    
+    def __init__(self, parser, tokens):
+        self.functions = parser.functions
+        self.tokens = tokens
+        self.position = 0
+    
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position].text
+        return None
+    
+    def advance(self):
+        self.position += 1
+        return self.tokens[self.position - 1]
+    
+    def error(self, message):
+        if self.position < len(self.tokens):
+            where = f"at position {self.tokens[self.position].position}"
+        else:
+            where = "at end of expression"
+        return ValueError(f"Cannot parse expression: {message} {where}")
+    
+    def build(self):
+        tree = self.additive()
+        if self.peek() is not None:
+            raise self.error(f"unexpected '{self.peek()}'")
+        return tree
+    
+    def additive(self):
+        node = self.multiplicative()
+        while self.peek() in ('+', '-'):
+            op = self.advance().text
+            node = BinaryOp(op, node, self.multiplicative())
+        return node
+    
+    def multiplicative(self):
+        node = self.unary()
+        while self.peek() in ('*', '/', '%'):
+            op = self.advance().text
+            node = BinaryOp(op, node, self.unary())
+        return node
+    
+    def unary(self):
+        if self.peek() == '-':
+            self.advance()
+            return UnaryOp('-', self.unary())
+        if self.peek() == '+':
+            self.advance()
+            return self.unary()
+        return self.power()
+    
+    def power(self):
+        node = self.primary()
+        if self.peek() == '^':
+            self.advance()
+            # Right associative, and binds tighter than a leading minus
+            node = BinaryOp('^', node, self.unary())
+        return node
+    
+    def primary(self):
+        if self.peek() is None:
+            raise self.error("missing operand")
+        
+        token = self.tokens[self.position]
+        if token.kind == 'lparen':
+            self.advance()
+            node = self.additive()
+            self.expect(')')
+            return node
+        
+        if token.kind == 'name':
+            self.advance()
+            if token.text not in self.functions:
+                return Variable(token.text)
+            self.expect('(')
+            argument = self.additive()
+            self.expect(')')
+            return FunctionCall(token.text, argument)
+        
+        if token.kind == 'number':
+            self.advance()
+            return Number(token.text)
+        
+        raise self.error(f"unexpected '{token.text}'")
+    
+    def expect(self, expected):
+        if self.peek() is None:
+            raise self.error(f"expected '{expected}'")
+        if self.peek() != expected:
+            raise self.error(f"expected '{expected}' but found "
+                             f"'{self.peek()}'")
+        self.advance()
+
+
+def children(node):
+    """Operands of node, empty for numbers and variables"""
+    if isinstance(node, BinaryOp):
+        return (node.left, node.right)
+    if isinstance(node, UnaryOp):
+        return (node.operand,)
+    if isinstance(node, FunctionCall):
+        return (node.argument,)
+    return ()
+
+
+def _transform(tree, leave, operands=children, enter=None):
+    """Rewrite tree bottom-up with an explicit stack instead of recursion
+    
+    leave(node, results) gets the results for operands(node) in order.
+    enter(node) may return a result to use without descending into node.
+    Shared nodes are visited once per use.
+    """
+    results = []
+    stack = [(tree, None)]
+    while stack:
+        node, items = stack.pop()
+        if items is None:
+            if enter is not None:
+                result = enter(node)
+                if result is not None:
+                    results.append(result)
+                    continue
+            items = tuple(operands(node))
+            stack.append((node, items))
+            stack.extend((item, None) for item in reversed(items))
+            continue
+        
+        if items:
+            arguments = results[-len(items):]
+            del results[-len(items):]
+        else:
+            arguments = []
+        results.append(leave(node, arguments))
+    return results[0]
+
+
+# Binding strength used when rendering infix text
+_INFIX_PRECEDENCE = {'+': 1, '-': 1, '*': 2, '/': 2, '%': 2, 'neg': 3, '^': 4}
+
+
+def to_infix(node):
+    """Render tree as compact infix text with only the needed parentheses"""
+    return _transform(node, _infix)
+
+
+def _infix(node, operands):
+    """Infix text of node given the infix text of its operands"""
+    if isinstance(node, Number):
+        return node.text
+    if isinstance(node, Variable):
+        return node.name
+    if isinstance(node, FunctionCall):
+        return f"{node.name}({operands[0]})"
+    if isinstance(node, UnaryOp):
+        return "-" + _infix_operand(node.operand, operands[0],
+                                    _INFIX_PRECEDENCE['neg'], False)
+    
+    precedence = _INFIX_PRECEDENCE[node.op]
+    right_associative = node.op == '^'
+    left = _infix_operand(node.left, operands[0], precedence,
+                          right_associative)
+    right = _infix_operand(node.right, operands[1], precedence,
+                           not right_associative)
+    return f"{left}{node.op}{right}"
+
+
+def _infix_operand(node, text, precedence, strict):
+    """Parenthesize operand text when node binds looser than its parent"""
+    if isinstance(node, BinaryOp):
+        inner = _INFIX_PRECEDENCE[node.op]
+    elif isinstance(node, UnaryOp):
+        inner = _INFIX_PRECEDENCE['neg']
+    else:
+        return text
+    
+    if inner < precedence or (strict and inner == precedence):
+        return f"({text})"
+    return text
+
+
+def to_postfix(node):
+    """Render tree in postfix (reverse Polish) notation"""
+    tokens = []
+    _walk(node, tokens, postfix=True)
+    return ' '.join(tokens)
+
+
+def to_prefix(node):
+    """Render tree in prefix (Polish) notation"""
+    tokens = []
+    _walk(node, tokens, postfix=False)
+    return ' '.join(tokens)
+
+
+def _walk(node, tokens, postfix):
+    """Collect tokens with the operator after or before its operands"""
+    # Pending nodes, and operator strings waiting for their operands
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str):
+            tokens.append(node)
+        elif isinstance(node, Number):
+            tokens.append(node.text)
+        elif isinstance(node, Variable):
+            tokens.append(node.name)
+        else:
+            if isinstance(node, FunctionCall):
+                op, operands = node.name, (node.argument,)
+            elif isinstance(node, UnaryOp):
+                op, operands = node.op, (node.operand,)
+            else:
+                op, operands = node.op, (node.left, node.right)
+            
+            if postfix:
+                stack.append(op)
+            stack.extend(reversed(operands))
+            if not postfix:
+                tokens.append(op)
+
+
+def to_tree(node):
+    """Render tree with every operation explicitly grouped"""
+    return _transform(node, _grouped)
+
+
+def _grouped(node, operands):
+    """Fully grouped text of node given that of its operands"""
+    if isinstance(node, Number):
+        return node.text
+    if isinstance(node, Variable):
+        return node.name
+    if isinstance(node, FunctionCall):
+        return f"{node.name}({operands[0]})"
+    if isinstance(node, UnaryOp):
+        return f"({node.op}{operands[0]})"
+    return f"({operands[0]} {node.op} {operands[1]})"
+
+
+def shared_nodes(tree):
+    """Ids of operation nodes reached through more than one parent"""
+    counts = {}
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        operands = children(node)
+        if not operands:
+            continue
+        counts[id(node)] = counts.get(id(node), 0) + 1
+        if counts[id(node)] == 1:
+            stack.extend(operands)
+    return [key for key, count in counts.items() if count > 1]
+
+
+_FOLD_OPERATORS = {
+    '+': lambda a, b: a + b, '-': lambda a, b: a - b,
+    '*': lambda a, b: a * b, '/': lambda a, b: a / b,
+    '%': lambda a, b: a % b, '^': lambda a, b: a ** b
+}
+
+
+class _Optimizer:
+    """Constant folding, algebraic simplification and CSE over one tree
+    
+    Equal subtrees are merged into one node object, so the result is a
+    DAG; shared operation nodes are evaluated once into temporaries.
+    """
+    
+    def __init__(self):
+        # Structural key -> canonical node; keys use ids of canonical children
+        self.nodes = {}
+    
+    def canonical(self, node, key):
+        return self.nodes.setdefault(key, node)
+    
+    def number(self, value):
+        return self.canonical(Number(repr(value)), ('num', value))
+    
+    def fold(self, function, *values):
+        """Constant result of function, or None if it is not a finite float"""
+        try:
+            result = function(*values)
+        except (ArithmeticError, ValueError):
+            return None
+        if not isinstance(result, float) or not math.isfinite(result):
+            return None
+        return self.number(result)
+    
+    def binary(self, op, left, right):
+        return self.canonical(BinaryOp(op, left, right),
+                              ('bin', op, id(left), id(right)))
+    
+    def visit(self, node):
+        """Return the canonical, simplified node for node"""
+        return _transform(node, self.leave, self.operands)
+    
+    def operands(self, node):
+        """Children of node, or all operands of a whole + or * chain"""
+        if not isinstance(node, BinaryOp) or node.op not in '+*':
+            return children(node)
+        operands = []
+        stack = [node]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, BinaryOp) and item.op == node.op:
+                stack.extend((item.right, item.left))
+            else:
+                operands.append(item)
+        return operands
+    
+    def leave(self, node, operands):
+        """Canonical, simplified node for node with simplified operands"""
+        if isinstance(node, Number):
+            return self.canonical(node, ('num', node.value))
+        if isinstance(node, Variable):
+            return self.canonical(node, ('var', node.name))
+        
+        if isinstance(node, FunctionCall):
+            argument, = operands
+            if isinstance(argument, Number):
+                folded = self.fold(MATH_FUNCTIONS[node.name], argument.value)
+                if folded is not None:
+                    return folded
+            return self.canonical(FunctionCall(node.name, argument),
+                                  ('call', node.name, id(argument)))
+        
+        if isinstance(node, UnaryOp):
+            operand, = operands
+            if isinstance(operand, Number):
+                return self.number(-operand.value)
+            if isinstance(operand, UnaryOp):
+                return operand.operand
+            return self.canonical(UnaryOp(node.op, operand),
+                                  ('neg', id(operand)))
+        
+        if node.op in '+*':
+            return self.chain(node.op, operands)
+        
+        left, right = operands
+        if isinstance(left, Number) and isinstance(right, Number):
+            folded = self.fold(_FOLD_OPERATORS[node.op], left.value,
+                               right.value)
+            if folded is not None:
+                return folded
+        
+        if isinstance(right, Number):
+            if right.value == 1 and node.op in '/^':
+                return left
+            if right.value == 0 and node.op == '-':
+                return left
+            if right.value == 2 and node.op == '^':
+                return self.binary('*', left, left)
+        return self.binary(node.op, left, right)
+    
+    def chain(self, op, operands):
+        """Fold all constants of a + or * chain such as 2*x*2*x into one"""
+        identity = 1.0 if op == '*' else 0.0
+        value = identity
+        numbers = 0
+        terms = []
+        for operand in operands:
+            if isinstance(operand, Number):
+                value = _FOLD_OPERATORS[op](value, operand.value)
+                numbers += 1
+            else:
+                terms.append(operand)
+        
+        if numbers and (not math.isfinite(value) or not terms):
+            if not math.isfinite(value):
+                # Overflowed constants stay unfolded, as written
+                terms = operands
+            else:
+                return self.number(value)
+        elif numbers and value != identity:
+            # Coefficient leads a product and trails a sum
+            constant = self.number(value)
+            terms = [constant] + terms if op == '*' else terms + [constant]
+        
+        result = terms[0]
+        for term in terms[1:]:
+            result = self.binary(op, result, term)
+        return result
+
+
+def postorder(tree):
+    """Distinct nodes of tree, every node after its operands"""
+    order = []
+    seen = set()
+    stack = [(tree, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if id(node) in seen:
+            continue
+        if expanded:
+            seen.add(id(node))
+            order.append(node)
+        else:
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(children(node)))
+    return order
+
+
+def tree_size(node):
+    """Number of nodes in tree, counting shared nodes once per use"""
+    size = 0
+    stack = [node]
+    while stack:
+        size += 1
+        stack.extend(children(stack.pop()))
+    return size
+
+
+def optimize(tree):
+    """Return (optimized tree, number of nodes eliminated)
+    
+    Folds constants, rewrites x^2 as x*x, drops identities such as x*1
+    and merges repeated subtrees so each is computed once.
+    """
+    optimized = _Optimizer().visit(tree)
+    unique = set()
+    stack = [optimized]
+    while stack:
+        node = stack.pop()
+        if id(node) not in unique:
+            unique.add(id(node))
+            stack.extend(children(node))
+    return optimized, tree_size(tree) - len(unique)
+
+
+# Binding strength of the Python operators in compiled source
+_PYTHON_PRECEDENCE = {'+': 1, '-': 1, '*': 2, '/': 2, '%': 2, 'neg': 3,
+                      '**': 4}
+_ATOM = 5
+
+
+def _python_source(node, variables, constants, temporaries=None):
+    """Translate tree to Python source for the compiled lambda
+    
+    Parentheses are emitted only where Python's precedence needs them.
+    temporaries maps ids of shared nodes to names; the first use assigns
+    the temporary with := and later uses read it.
+    """
+    def enter(node):
+        if temporaries and id(node) in temporaries:
+            name, assigned = temporaries[id(node)]
+            if assigned:
+                return name, _ATOM
+        return None
+    
+    def leave(node, operands):
+        if isinstance(node, Number):
+            constants.append(node.value)
+            source = f'_c{len(constants) - 1}', _ATOM
+        elif isinstance(node, Variable):
+            # Variables become positional lambda arguments, so names like
+            # 'x' never clash with the 'x' inside 'exp'
+            if node.name not in variables:
+                variables.append(node.name)
+            source = f'_v{variables.index(node.name)}', _ATOM
+        elif isinstance(node, FunctionCall):
+            source = f"_f_{node.name}({operands[0][0]})", _ATOM
+        elif isinstance(node, UnaryOp):
+            precedence = _PYTHON_PRECEDENCE['neg']
+            source = (f"-{_python_operand(operands[0], precedence, False)}",
+                      precedence)
+        else:
+            op = '**' if node.op == '^' else node.op
+            precedence = _PYTHON_PRECEDENCE[op]
+            right_associative = op == '**'
+            left = _python_operand(operands[0], precedence, right_associative)
+            right = _python_operand(operands[1], precedence,
+                                    not right_associative)
+            source = f"{left} {op} {right}", precedence
+        
+        if temporaries and id(node) in temporaries:
+            name, _ = temporaries[id(node)]
+            temporaries[id(node)] = (name, True)
+            return f"({name} := {source[0]})", _ATOM
+        return source
+    
+    return _transform(node, leave, enter=enter)[0]
+
+
+def _python_operand(operand, precedence, strict):
+    """Parenthesize (source, precedence) when it binds looser than needed"""
+    source, inner = operand
+    if inner < precedence or (strict and inner == precedence):
+        return f"({source})"
+    return source
+
+
+def count_operations(node):
+    """Number of distinct operator and function nodes, each one temporary"""
+    seen = set()
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        operands = children(node)
+        if operands and id(node) not in seen:
+            seen.add(id(node))
+            stack.extend(operands)
+    return len(seen)
+
+
+class CompiledExpression:
+    """Expression parsed once and evaluated by a plain function call"""
+    
+    def __init__(self, expression, normalized, tree, optimize_tree=True):
+        self.expression = expression
+        self.normalized = normalized
+        self.tree = tree
+        
+        # Notations render the tree as typed; evaluation uses the optimized
+        # one, where shared nodes become := temporaries
+        self.optimized, self.eliminated = (optimize(tree) if optimize_tree
+                                           else (tree, 0))
+        temporaries = {key: (f'_t{i}', False) for i, key
+                       in enumerate(shared_nodes(self.optimized))}
+        variables = []
+        constants = []
+        source = _python_source(self.optimized, variables, constants,
+                                temporaries)
+        arguments = ', '.join(f'_v{i}' for i in range(len(variables)))
+        
+        self.variables = tuple(variables)
+        self.constants = tuple(constants)
+        self.operations = count_operations(self.optimized)
+        self.functions = frozenset(node.name for node in postorder(self.optimized)
+                                   if isinstance(node, FunctionCall))
+        try:
+            self._code = compile(f"lambda {arguments}: {source}",
+                                 '<expression>', 'eval')
+        except (SyntaxError, RecursionError, MemoryError):
+            raise ValueError("Cannot parse expression: too long or too "
+                             "deeply nested to compile")
+        self._function = self._bind(MATH_FUNCTIONS, float)
+        self._vector_functions = {}
+        self._notations = {}
+    
+    def _notation(self, render):
+        """Render a notation once and keep it with the cached expression"""
+        text = self._notations.get(render)
+        if text is None:
+            text = self._notations[render] = render(self.tree)
+        return text
+    
+    @property
+    def infix(self):
+        return self._notation(to_infix)
+    
+    @property
+    def prefix(self):
+        return self._notation(to_prefix)
+    
+    @property
+    def postfix(self):
+        return self._notation(to_postfix)
+    
+    @property
+    def parse_tree(self):
+        return self._notation(to_tree)
+    
+    def __call__(self, **variables):
+        return self.evaluate(variables)
+    
+    def _bind(self, functions, number):
+        """Build the lambda with functions and constants of one backend"""
+        namespace = {'__builtins__': {}}
+        for name, function in functions.items():
+            namespace['_f_' + name] = function
+        for i, value in enumerate(self.constants):
+            namespace[f'_c{i}'] = number(value)
+        return eval(self._code, namespace)
+    
+    def _arguments(self, variables):
+        """Order variable values as the compiled lambda expects them"""
         if variables is None:
             variables = {}
-        
         try:
-            # Normalize expression
-            expr = self.normalize_expression(expression)
-            
-            # Replace variables
-            for var, value in variables.items():
-                expr = expr.replace(var, str(value))
-            
-            # Replace functions with math module equivalents
-            expr = expr.replace('sin', 'math.sin')
-            expr = expr.replace('cos', 'math.cos')
-            expr = expr.replace('tan', 'math.tan')
-            expr = expr.replace('log', 'math.log10')
-            expr = expr.replace('ln', 'math.log')
-            expr = expr.replace('sqrt', 'math.sqrt')
-            expr = expr.replace('exp', 'math.exp')
-            expr = expr.replace('abs', 'math.fabs')
-            expr = expr.replace('^', '**')
-            # Evaluate safely
-            return eval(expr, {"__builtins__": {}, "math": math})
-            
+            return [variables[name] for name in self.variables]
+        except KeyError as e:
+            raise ValueError(f"Cannot evaluate expression: "
+                             f"name {e} is not defined")
+    
+    def evaluate(self, variables=None):
+        """Evaluate compiled expression with given variables"""
+        arguments = self._arguments(variables)
+        try:
+            return self._function(*arguments)
         except Exception as e:
             raise ValueError(f"Cannot evaluate expression: {str(e)}")
+    
+    def kernel_source(self, x_name='x', y_name='y', name='kernel'):
+        """Python source of a loop filling out[i, j] = f(x[j], y[i])
+        
+        The module binds functions and constants as globals and computes
+        shared subtrees once per element, so Numba can compile it as is.
+        """
+        for variable in self.variables:
+            if variable not in (x_name, y_name):
+                raise ValueError(f"Cannot evaluate expression: "
+                                 f"name '{variable}' is not defined")
+        
+        shared = set(shared_nodes(self.optimized))
+        names = {}
+        lines = []
+        variables = list(self.variables)
+        constants = []
+        for node in postorder(self.optimized):
+            if id(node) in shared:
+                body = _python_source(node, variables, constants, names)
+                names[id(node)] = (f'_t{len(names)}', True)
+                lines.append(f"{names[id(node)][0]} = {body}")
+        result = _python_source(self.optimized, variables, constants, names)
+        
+        source = [f"# Generated from: {self.normalized}", "import math", ""]
+        source += [f"_f_{function} = math.{MATH_FUNCTIONS[function].__name__}"
+                   for function in sorted(self.functions)]
+        source += [f"_c{i} = {value!r}" for i, value in enumerate(constants)]
+        source += ["", "", f"def {name}(_x, _y, out):",
+                   "    for i in range(out.shape[0]):"]
+        if y_name in variables:
+            source.append(f"        _v{variables.index(y_name)} = _y[i]")
+        source.append("        for j in range(out.shape[1]):")
+        if x_name in variables:
+            source.append(f"            _v{variables.index(x_name)} = _x[j]")
+        source += [f"            {line}" for line in lines]
+        source += [f"            value = {result}",
+                   "            out[i, j] = value if math.isfinite(value) "
+                   "else math.nan", ""]
+        return '\n'.join(source)
+    
+    def evaluate_array(self, variables=None, dtype=None):
+        """Evaluate over NumPy arrays in one call, NaN where undefined
+        
+        dtype defaults to float64; float32 halves memory for large grids.
+        """
+        import numpy as np
+        
+        dtype = np.dtype(np.float64 if dtype is None else dtype)
+        function = self._vector_functions.get(dtype)
+        if function is None:
+            # Constants match dtype so they never promote float32 arrays
+            function = self._bind(numpy_functions(), dtype.type)
+            self._vector_functions[dtype] = function
+        
+        arguments = [np.asarray(value, dtype=dtype)
+                     for value in self._arguments(variables)]
+        # Shape comes from every supplied variable, so constants still fill
+        # the whole grid
+        shape = np.broadcast_shapes(*(np.shape(value) for value
+                                      in (variables or {}).values()))
+        
+        # Domain errors become inf/nan instead of per-point exceptions
+        with np.errstate(all='ignore'):
+            try:
+                result = function(*arguments)
+            except Exception as e:
+                raise ValueError(f"Cannot evaluate expression: {str(e)}")
+        
+        result = np.array(np.broadcast_to(result, shape), dtype=dtype)
+        result[~np.isfinite(result)] = np.nan
+        return result
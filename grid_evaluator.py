@@ -0,0 +1,419 @@
+"""
+Memory-bounded evaluation of expressions over large 2D grids
+Rows are evaluated in tiles and a 1-D row of x values is broadcast against
+a column of y values, so no full meshgrid or full-size temporary is built.
+"""
+
+import hashlib
+import importlib.util
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from expression_parser import (FunctionCall, Number, UnaryOp, Variable,
+                               children, numpy_functions, postorder)
+
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Cache-sized blocks for the thread evaluator's scratch buffers
+DEFAULT_BLOCK_BYTES = 256 * 1024
+
+# One pool per worker count, kept alive between plots
+_pools = {}
+_thread_pools = {}
+
+# Worker process state, set up once by _init_worker
+_parser = None
+
+# Generated kernel modules; Numba keeps their machine code next to them
+KERNEL_CACHE_DIR = os.environ.get(
+    'GRAPHING_KERNEL_CACHE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'graphing_calculator',
+                 'kernels'))
+
+# Part of every kernel's hash; bump to orphan caches of older kernel loaders
+KERNEL_VERSION = 2
+
+# Loaded kernels by source hash, shared by every JitGridEvaluator
+_kernels = {}
+_kernels_lock = threading.Lock()
+
+
+class GridEvaluator:
+    """Evaluates a compiled expression over a grid in row tiles
+    
+    max_bytes bounds the working memory of one tile; the result grid itself
+    is allocated once up front. dtype='float32' halves both.
+    """
+    
+    name = 'numpy'
+    
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, dtype=np.float64):
+        self.max_bytes = max_bytes
+        self.dtype = np.dtype(dtype)
+    
+    def rows_per_tile(self, compiled, columns):
+        """Largest tile height whose temporaries fit in max_bytes"""
+        # Broadcast inputs, the result and one temporary per operation
+        row_bytes = columns * self.dtype.itemsize * (2 + compiled.operations)
+        return max(1, int(self.max_bytes // row_bytes))
+    
+    def tiles(self, compiled, rows, columns, count=1):
+        """Yield (start, stop) row slices covering the grid, at least count"""
+        step = min(self.rows_per_tile(compiled, columns), -(-rows // count))
+        for start in range(0, rows, step):
+            yield start, min(start + step, rows)
+    
+    def evaluate(self, compiled, x_name, x_values, y_name, y_values, out=None):
+        """Return Z with Z[i, j] = f(x_values[j], y_values[i]), NaN where undefined"""
+        x = np.asarray(x_values, dtype=self.dtype).reshape(1, -1)
+        y = np.asarray(y_values, dtype=self.dtype).reshape(-1, 1)
+        shape = (y.shape[0], x.shape[1])
+        if out is None:
+            out = np.empty(shape, dtype=self.dtype)
+        
+        for start, stop in self.tiles(compiled, *shape):
+            out[start:stop] = compiled.evaluate_array(
+                {x_name: x, y_name: y[start:stop]}, dtype=self.dtype)
+        return out
+
+
+def process_pool(workers):
+    """Shared ProcessPoolExecutor with the given number of workers"""
+    pool = _pools.get(workers)
+    if pool is None:
+        pool = _pools[workers] = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker)
+    return pool
+
+
+def thread_pool(workers):
+    """Shared ThreadPoolExecutor with the given number of workers"""
+    pool = _thread_pools.get(workers)
+    if pool is None:
+        pool = _thread_pools[workers] = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='grid')
+    return pool
+
+
+def shutdown_pools():
+    """Stop all worker processes and threads"""
+    for pools in (_pools, _thread_pools):
+        while pools:
+            pools.popitem()[1].shutdown(cancel_futures=True)
+
+
+def _init_worker():
+    global _parser
+    from expression_parser import ExpressionParser
+    _parser = ExpressionParser()
+
+
+def _evaluate_tile(expression, x_name, x, y_name, y, memory, shape, dtype,
+                   start, stop, max_bytes):
+    """Worker side: evaluate rows start:stop straight into shared memory"""
+    # Compiled once per worker, then served from its expression cache
+    compiled = _parser.compile(expression)
+    block = shared_memory.SharedMemory(name=memory)
+    try:
+        out = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        GridEvaluator(max_bytes, dtype).evaluate(
+            compiled, x_name, x, y_name, y, out=out[start:stop])
+        del out
+    finally:
+        block.close()
+
+
+class ProcessGridEvaluator(GridEvaluator):
+    """Evaluates row tiles in parallel worker processes
+    
+    Workers write their tiles into one shared memory block, so only the
+    1-D axes and the expression text are pickled. Starting the pool costs
+    far more than a small grid, so use it only for large ones.
+    """
+    
+    name = 'processes'
+    
+    def __init__(self, workers=None, max_bytes=DEFAULT_MAX_BYTES,
+                 dtype=np.float64):
+        super().__init__(max_bytes, dtype)
+        self.workers = workers or os.cpu_count() or 1
+    
+    def evaluate(self, compiled, x_name, x_values, y_name, y_values, out=None):
+        """Return Z with Z[i, j] = f(x_values[j], y_values[i]), NaN where undefined"""
+        x = np.asarray(x_values, dtype=self.dtype).reshape(-1)
+        y = np.asarray(y_values, dtype=self.dtype).reshape(-1)
+        shape = (y.size, x.size)
+        if out is None:
+            out = np.empty(shape, dtype=self.dtype)
+        
+        # Per-process memory ceiling, shared between the workers
+        max_bytes = max(1, self.max_bytes // self.workers)
+        block = shared_memory.SharedMemory(
+            create=True, size=max(1, out.size * self.dtype.itemsize))
+        try:
+            pool = process_pool(self.workers)
+            futures = [pool.submit(_evaluate_tile, compiled.normalized,
+                                   x_name, x, y_name, y[start:stop],
+                                   block.name, shape,
+                                   self.dtype.str, start, stop, max_bytes)
+                       for start, stop in self.tiles(compiled, *shape,
+                                                     count=self.workers)]
+            for future in futures:
+                future.result()
+            out[...] = np.ndarray(shape, dtype=self.dtype, buffer=block.buf)
+        finally:
+            block.close()
+            block.unlink()
+        return out
+
+
+_OPERATORS = {'+': np.add, '-': np.subtract, '*': np.multiply,
+              '/': np.divide, '%': np.mod, '^': np.power}
+
+
+class UfuncProgram:
+    """Expression tree flattened into ufunc calls on reusable buffers
+    
+    Each instruction is (ufunc, operands, slot); operands are constants,
+    variables or scratch slots. Slots are freed after their last read, so
+    a program needs about as many scratch buffers as the tree is deep, and
+    a subtree shared by the optimizer is computed once and read again.
+    slot_variables[slot] names the variables a slot depends on, so a
+    buffer only needs to span those axes: sin(x) is one row, not a block.
+    """
+    
+    def __init__(self, tree, dtype=np.float64):
+        self.dtype = np.dtype(dtype)
+        self.instructions = []
+        self.slot_variables = []
+        self._functions = numpy_functions()
+        self._free = {}
+        self._emitted = {}
+        self._reads = {}
+        
+        # Reads left per node, one for every parent that uses it
+        self._uses = {}
+        seen = set()
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            if id(node) in seen:
+                continue
+            seen.add(id(node))
+            for child in children(node):
+                self._uses[id(child)] = self._uses.get(id(child), 0) + 1
+                stack.append(child)
+        
+        # Operands first, in the order a recursive walk would emit them,
+        # so _emit only ever looks one level down
+        for node in postorder(tree):
+            self._emit(node)
+        self.result = self._emit(tree)[0]
+    
+    def _allocate(self, variables):
+        free = self._free.get(variables)
+        if free:
+            return free.pop()
+        self.slot_variables.append(variables)
+        return len(self.slot_variables) - 1
+    
+    def _emit(self, node):
+        """Append instructions for node, returning (operand, variables)"""
+        if id(node) in self._emitted:
+            return self._emitted[id(node)]
+        if isinstance(node, Number):
+            return ('const', self.dtype.type(node.value)), frozenset()
+        if isinstance(node, Variable):
+            return ('var', node.name), frozenset((node.name,))
+        
+        if isinstance(node, FunctionCall):
+            ufunc = self._functions[node.name]
+            operands = [self._emit(node.argument)]
+        elif isinstance(node, UnaryOp):
+            ufunc = np.negative
+            operands = [self._emit(node.operand)]
+        else:
+            ufunc = _OPERATORS[node.op]
+            operands = [self._emit(node.left), self._emit(node.right)]
+        
+        # Inputs read for the last time die here, so the result may
+        # overwrite one of them
+        variables = frozenset().union(*[names for _, names in operands])
+        operands = [operand for operand, _ in operands]
+        for kind, item in operands:
+            if kind == 'slot':
+                self._reads[item] -= 1
+                if self._reads[item] == 0:
+                    self._free.setdefault(self.slot_variables[item],
+                                          []).append(item)
+        slot = self._allocate(variables)
+        self._reads[slot] = self._uses.get(id(node), 0)
+        self.instructions.append((ufunc, operands, slot))
+        result = self._emitted[id(node)] = (('slot', slot), variables)
+        return result
+    
+    def run(self, variables, out, scratch):
+        """Evaluate into out; scratch[slot] broadcasts against out"""
+        def value(operand):
+            kind, item = operand
+            if kind == 'slot':
+                return scratch[item]
+            if kind == 'var':
+                return variables[item]
+            return item
+        
+        if not self.instructions:
+            np.copyto(out, value(self.result))
+            return out
+        
+        last = len(self.instructions) - 1
+        for index, (ufunc, operands, slot) in enumerate(self.instructions):
+            ufunc(*[value(operand) for operand in operands],
+                  out=out if index == last else scratch[slot])
+        return out
+
+
+class ThreadGridEvaluator(GridEvaluator):
+    """Evaluates cache-sized row blocks on a thread pool
+    
+    NumPy ufuncs release the GIL on float arrays, so blocks run in
+    parallel. Every ufunc writes into a preallocated scratch buffer with
+    out=, so no full-size temporaries are created at all.
+    """
+    
+    name = 'threads'
+    
+    def __init__(self, workers=None, block_bytes=DEFAULT_BLOCK_BYTES,
+                 dtype=np.float64):
+        super().__init__(dtype=dtype)
+        self.workers = workers or os.cpu_count() or 1
+        self.block_bytes = block_bytes
+    
+    def evaluate(self, compiled, x_name, x_values, y_name, y_values, out=None):
+        """Return Z with Z[i, j] = f(x_values[j], y_values[i]), NaN where undefined"""
+        x = np.asarray(x_values, dtype=self.dtype).reshape(1, -1)
+        y = np.asarray(y_values, dtype=self.dtype).reshape(-1, 1)
+        rows, columns = y.shape[0], x.shape[1]
+        if out is None:
+            out = np.empty((rows, columns), dtype=self.dtype)
+        
+        for name in compiled.variables:
+            if name not in (x_name, y_name):
+                raise ValueError(
+                    f"Cannot evaluate expression: name '{name}' is not defined")
+        
+        program = UfuncProgram(compiled.optimized, self.dtype)
+        block_rows = max(1, self.block_bytes // (columns * self.dtype.itemsize))
+        
+        def run(start, stop):
+            # Scratch buffers live for the whole chunk, reused per block
+            scratch = [np.empty((block_rows if y_name in names else 1,
+                                 columns if x_name in names else 1),
+                                dtype=self.dtype)
+                       for names in program.slot_variables]
+            with np.errstate(all='ignore'):
+                for begin in range(start, stop, block_rows):
+                    end = min(begin + block_rows, stop)
+                    block = out[begin:end]
+                    program.run({x_name: x, y_name: y[begin:end]}, block,
+                                [buffer[:end - begin] for buffer in scratch])
+                    block[~np.isfinite(block)] = np.nan
+        
+        # A few chunks per thread keeps them busy when blocks differ in cost
+        chunk = max(block_rows, -(-rows // (self.workers * 4)))
+        pool = thread_pool(self.workers)
+        futures = [pool.submit(run, start, min(start + chunk, rows))
+                   for start in range(0, rows, chunk)]
+        for future in futures:
+            future.result()
+        return out
+
+
+def numba_available():
+    """Whether Numba can be imported, without importing it yet"""
+    return importlib.util.find_spec('numba') is not None
+
+
+def load_kernel(source):
+    """JIT-compile kernel source, reusing the on-disk and in-memory caches"""
+    digest = hashlib.sha1(f'{KERNEL_VERSION}\n{source}'.encode('utf-8')
+                          ).hexdigest()[:16]
+    with _kernels_lock:
+        kernel = _kernels.get(digest)
+        if kernel is not None:
+            return kernel
+        
+        import numba
+        
+        # A stable path per source lets njit(cache=True) find its cache
+        os.makedirs(KERNEL_CACHE_DIR, exist_ok=True)
+        path = os.path.join(KERNEL_CACHE_DIR, f'kernel_{digest}.py')
+        if not os.path.exists(path):
+            temporary = f'{path}.{os.getpid()}.tmp'
+            with open(temporary, 'w', encoding='utf-8') as file:
+                file.write(source)
+            os.replace(temporary, path)
+        
+        spec = importlib.util.spec_from_file_location(f'kernel_{digest}', path)
+        module = importlib.util.module_from_spec(spec)
+        # Numba's disk cache re-imports the kernel's module by name
+        sys.modules[spec.name] = module
+        spec.loader.exec_module(module)
+        kernel = _kernels[digest] = numba.njit(
+            cache=True, error_model='numpy')(module.kernel)
+        return kernel
+
+
+class JitGridEvaluator(GridEvaluator):
+    """Evaluates the grid with a Numba-compiled element-wise loop
+    
+    The loop needs no temporaries at all. Compiling costs about a second
+    per expression the first time, after which Numba's disk cache makes it
+    cheap in later sessions too. Without Numba, or if compilation fails,
+    falls back to the NumPy tiles.
+    """
+    
+    name = 'numba'
+    
+    def evaluate(self, compiled, x_name, x_values, y_name, y_values, out=None):
+        """Return Z with Z[i, j] = f(x_values[j], y_values[i]), NaN where undefined"""
+        source = compiled.kernel_source(x_name, y_name)
+        x = np.ascontiguousarray(x_values, dtype=self.dtype).reshape(-1)
+        y = np.ascontiguousarray(y_values, dtype=self.dtype).reshape(-1)
+        if out is None:
+            out = np.empty((y.size, x.size), dtype=self.dtype)
+        
+        if numba_available():
+            try:
+                # Compiles, or loads from the disk cache, on the first call
+                load_kernel(source)(x, y, out)
+                self.name = 'numba'
+                return out
+            except Exception:
+                pass
+        self.name = GridEvaluator.name
+        return super().evaluate(compiled, x_name, x_values, y_name, y_values,
+                                out)
+
+
+def select_evaluator(points, workers=1, threads=1, max_bytes=DEFAULT_MAX_BYTES,
+                     dtype=np.float64, parallel_min_points=500_000,
+                     jit_min_points=512 * 512):
+    """Pick a backend for a grid of the given number of points
+    
+    Small grids use NumPy tiles. Very large ones use the Numba loop when
+    it is importable, else the worker processes or threads if enabled.
+    """
+    if points >= jit_min_points and numba_available():
+        return JitGridEvaluator(max_bytes, dtype)
+    if points >= parallel_min_points and workers != 1:
+        return ProcessGridEvaluator(workers, max_bytes, dtype)
+    if points >= parallel_min_points and threads != 1:
+        return ThreadGridEvaluator(threads, dtype=dtype)
+    return GridEvaluator(max_bytes, dtype)
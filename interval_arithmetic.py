@@ -0,0 +1,450 @@
+"""
+Interval arithmetic over parsed expression trees
+Evaluates an expression for whole input intervals at once. The result is
+guaranteed to contain the value at every point of the inputs where the
+expression is defined, which lets the plotters skip regions that are
+undefined or off-screen and find axis limits without dense sampling.
+"""
+
+import heapq
+import math
+
+from expression_parser import (FunctionCall, Number, UnaryOp, Variable,
+                               postorder)
+
+
+INF = math.inf
+
+
+def _down(value):
+    """Round a computed lower bound outward by one ulp"""
+    return math.nextafter(value, -INF) if math.isfinite(value) else value
+
+
+def _up(value):
+    """Round a computed upper bound outward by one ulp"""
+    return math.nextafter(value, INF) if math.isfinite(value) else value
+
+
+class Interval:
+    """Closed interval [lo, hi] enclosing the defined values of an expression
+    
+    partial is True when part of the input may lie outside the domain (a
+    negative under sqrt, a pole of tan); empty intervals have no defined
+    point at all.
+    """
+    __slots__ = ('lo', 'hi', 'partial')
+    
+    def __init__(self, lo, hi, partial=False):
+        self.lo = lo
+        self.hi = hi
+        self.partial = partial
+    
+    @property
+    def empty(self):
+        return self.lo > self.hi
+    
+    @property
+    def bounded(self):
+        return not self.empty and math.isfinite(self.lo) and math.isfinite(self.hi)
+    
+    def __repr__(self):
+        if self.empty:
+            return 'Interval(empty)'
+        partial = ', partial' if self.partial else ''
+        return f'Interval({self.lo!r}, {self.hi!r}{partial})'
+
+
+EMPTY = Interval(INF, -INF, True)
+
+
+def _rounded(lo, hi, partial):
+    return Interval(_down(lo), _up(hi), partial)
+
+
+def _product(a, b):
+    """a * b with 0 * inf taken as 0, as interval bounds need"""
+    if a == 0 or b == 0:
+        return 0.0
+    return a * b
+
+
+def _add(a, b):
+    partial = a.partial or b.partial
+    return _rounded(a.lo + b.lo, a.hi + b.hi, partial)
+
+
+def _subtract(a, b):
+    partial = a.partial or b.partial
+    return _rounded(a.lo - b.hi, a.hi - b.lo, partial)
+
+
+def _multiply(a, b):
+    corners = [_product(x, y) for x in (a.lo, a.hi) for y in (b.lo, b.hi)]
+    return _rounded(min(corners), max(corners), a.partial or b.partial)
+
+
+def _reciprocal(b):
+    """1 / b; a divisor containing zero gives the whole line"""
+    if b.lo > 0 or b.hi < 0:
+        return _rounded(1 / b.hi, 1 / b.lo, b.partial)
+    if b.lo == 0 and b.hi == 0:
+        return EMPTY
+    if b.lo == 0:
+        return Interval(_down(1 / b.hi), INF, True)
+    if b.hi == 0:
+        return Interval(-INF, _up(1 / b.lo), True)
+    return Interval(-INF, INF, True)
+
+
+def _divide(a, b):
+    reciprocal = _reciprocal(b)
+    if reciprocal.empty:
+        return EMPTY
+    result = _multiply(a, reciprocal)
+    result.partial = result.partial or reciprocal.partial
+    return result
+
+
+def _modulo(a, b):
+    """Python/NumPy floor modulo, result takes the sign of the divisor"""
+    partial = a.partial or b.partial or (b.lo <= 0 <= b.hi)
+    if b.lo == b.hi and b.lo != 0 and math.isfinite(a.lo) and math.isfinite(a.hi):
+        divisor = b.lo
+        low, high = a.lo % divisor, a.hi % divisor
+        # Within one period the modulo is a shift and keeps the order; a
+        # wrap, including a rounded one such as -5e-324 % 3 == 3.0, does not
+        if low <= high and a.hi - a.lo < abs(divisor):
+            return _rounded(low, high, partial)
+    if b.lo > 0:
+        return Interval(0.0, _up(b.hi), partial)
+    if b.hi < 0:
+        return Interval(_down(b.lo), 0.0, partial)
+    bound = max(abs(b.lo), abs(b.hi))
+    return Interval(-bound, bound, True)
+
+
+def _power_value(base, exponent):
+    """base ** exponent for bounds, overflowing to a signed infinity"""
+    try:
+        result = base ** exponent
+    except OverflowError:
+        odd = exponent == int(exponent) and int(exponent) % 2
+        return -INF if base < 0 and odd else INF
+    except ZeroDivisionError:
+        return INF
+    return result
+
+
+def _power(a, b):
+    if b.lo == b.hi:
+        return _constant_power(a, b.lo, b.partial)
+    
+    # An exponent such as 1+1 or 4/2 is only ulps wide after outward
+    # rounding; take it as the integer it encloses, as NumPy's float
+    # arithmetic does, so negative bases stay defined. The hull with the
+    # variable-exponent enclosure keeps positive bases rigorous.
+    if (math.isfinite(b.lo) and math.isfinite(b.hi) and
+            math.ceil(b.lo) == math.floor(b.hi) and
+            b.hi - b.lo <= 8 * math.ulp(max(abs(b.hi), 1.0))):
+        n = math.ceil(b.lo)
+        result = _constant_power(a, float(n), b.partial)
+        rest = _variable_power(a, b)
+        if result.empty or rest.empty:
+            return result
+        return Interval(min(result.lo, rest.lo), max(result.hi, rest.hi),
+                        result.partial)
+    return _variable_power(a, b)
+
+
+def _variable_power(a, b):
+    """a ** b for an exponent interval wider than one value
+    
+    Positive bases have a real power for every exponent; negative bases
+    only for the integers in b, where |a| ** b bounds the magnitude.
+    """
+    partial = a.partial or b.partial or a.lo <= 0
+    negative = EMPTY
+    if a.lo < 0 and (not math.isfinite(b.lo) or not math.isfinite(b.hi) or
+                     math.ceil(b.lo) <= math.floor(b.hi)):
+        corners = [_power_value(x, y) for x in (max(-a.hi, 0.0), -a.lo)
+                   for y in (b.lo, b.hi)]
+        corners = [value for value in corners if isinstance(value, float)]
+        bound = _up(max(corners)) if corners else INF
+        negative = Interval(-bound, bound, True)
+    
+    if a.hi < 0 or (a.hi == 0 and b.hi <= 0):
+        return negative
+    low = max(a.lo, 0.0)
+    corners = [_power_value(x, y) for x in (low, a.hi) for y in (b.lo, b.hi)]
+    corners = [value for value in corners if isinstance(value, float)]
+    if not corners:
+        return Interval(-INF, INF, True)
+    result = _rounded(min(corners), max(corners), partial)
+    if negative.empty:
+        return result
+    return Interval(min(result.lo, negative.lo), max(result.hi, negative.hi),
+                    True)
+
+
+def _constant_power(a, n, partial):
+    partial = partial or a.partial
+    if n == 0:
+        return Interval(1.0, 1.0, partial)
+    
+    if n == int(n):
+        n = int(n)
+        if n < 0:
+            result = _reciprocal(_constant_power(a, -n, partial))
+            result.partial = result.partial or partial
+            return result
+        low, high = _power_value(a.lo, n), _power_value(a.hi, n)
+        if n % 2:
+            return _rounded(low, high, partial)
+        if a.lo <= 0 <= a.hi:
+            return Interval(0.0, _up(max(low, high)), partial)
+        return _rounded(min(low, high), max(low, high), partial)
+    
+    # Fractional exponent: negative bases are undefined (NaN in NumPy)
+    if a.hi < 0 or (a.hi == 0 and n < 0):
+        return EMPTY
+    partial = partial or a.lo < 0 or (n < 0 and a.lo <= 0)
+    low = max(a.lo, 0.0)
+    values = (_power_value(low, n), _power_value(a.hi, n))
+    return _rounded(min(values), max(values), partial)
+
+
+def _monotonic(function, a, low_limit=-INF, strict=False):
+    """Increasing function with domain (low_limit, inf), or [low_limit, inf)"""
+    if a.hi < low_limit or (strict and a.hi <= low_limit):
+        return EMPTY
+    partial = a.partial or a.lo < low_limit or (strict and a.lo <= low_limit)
+    
+    def value(x):
+        if strict and x <= low_limit:
+            return -INF
+        try:
+            return function(x)
+        except OverflowError:
+            return INF
+    
+    return _rounded(value(max(a.lo, low_limit)), value(a.hi), partial)
+
+
+def _contains_shifted(a, offset, period):
+    """Whether [a.lo, a.hi] contains offset + k * period for an integer k"""
+    k = math.ceil((a.lo - offset) / period)
+    return offset + k * period <= a.hi
+
+
+def _wave(function, a, peak):
+    """sin or cos over a, with its maximum at peak and minimum at peak + pi
+    
+    The endpoints are evaluated as given rather than shifted by a rounded
+    phase, so the bounds near a zero crossing stay outward-rounded; only
+    the test for a contained extreme uses the rounded pi, where the curve
+    is flat enough for that not to matter.
+    """
+    if not (math.isfinite(a.lo) and math.isfinite(a.hi)) or a.hi - a.lo >= 2 * math.pi:
+        return Interval(-1.0, 1.0, a.partial)
+    values = (function(a.lo), function(a.hi))
+    high = 1.0 if _contains_shifted(a, peak, 2 * math.pi) else _up(max(values))
+    low = -1.0 if _contains_shifted(a, peak + math.pi, 2 * math.pi) else _down(min(values))
+    return Interval(max(low, -1.0), min(high, 1.0), a.partial)
+
+
+def _tangent(a):
+    """tan over a; an interval around a pole is unbounded and partial"""
+    if (not (math.isfinite(a.lo) and math.isfinite(a.hi)) or
+            a.hi - a.lo >= math.pi or
+            _contains_shifted(a, math.pi / 2, math.pi)):
+        return Interval(-INF, INF, True)
+    return _rounded(math.tan(a.lo), math.tan(a.hi), a.partial)
+
+
+def _absolute(a):
+    if a.lo >= 0:
+        return Interval(a.lo, a.hi, a.partial)
+    if a.hi <= 0:
+        return Interval(-a.hi, -a.lo, a.partial)
+    return Interval(0.0, max(-a.lo, a.hi), a.partial)
+
+
+_FUNCTIONS = {
+    'sin': lambda a: _wave(math.sin, a, math.pi / 2),
+    'cos': lambda a: _wave(math.cos, a, 0.0),
+    'tan': _tangent,
+    'sqrt': lambda a: _monotonic(math.sqrt, a, 0.0),
+    'log': lambda a: _monotonic(math.log10, a, 0.0, strict=True),
+    'ln': lambda a: _monotonic(math.log, a, 0.0, strict=True),
+    'exp': lambda a: _monotonic(math.exp, a),
+    'abs': _absolute
+}
+
+_OPERATORS = {'+': _add, '-': _subtract, '*': _multiply, '/': _divide,
+              '%': _modulo, '^': _power}
+
+
+def as_interval(value):
+    """Interval from an Interval, a (lo, hi) pair or a single number"""
+    if isinstance(value, Interval):
+        return value
+    if isinstance(value, tuple):
+        return Interval(float(value[0]), float(value[1]))
+    return Interval(float(value), float(value))
+
+
+def evaluate_interval(tree, variables):
+    """Enclosure of tree's values when each variable ranges over an interval"""
+    intervals = {name: as_interval(value) for name, value in variables.items()}
+    memo = {}
+    
+    def visit(node):
+        key = id(node)
+        if key in memo:
+            return memo[key]
+        
+        if isinstance(node, Number):
+            result = Interval(node.value, node.value)
+        elif isinstance(node, Variable):
+            if node.name not in intervals:
+                raise ValueError(f"Cannot evaluate expression: "
+                                 f"name '{node.name}' is not defined")
+            result = intervals[node.name]
+        else:
+            if isinstance(node, FunctionCall):
+                operands = [visit(node.argument)]
+                operation = _FUNCTIONS[node.name]
+            elif isinstance(node, UnaryOp):
+                operands = [visit(node.operand)]
+                operation = lambda a: Interval(-a.hi, -a.lo, a.partial)
+            else:
+                operands = [visit(node.left), visit(node.right)]
+                operation = _OPERATORS[node.op]
+            
+            if any(operand.empty for operand in operands):
+                result = EMPTY
+            else:
+                result = operation(*operands)
+                if math.isnan(result.lo) or math.isnan(result.hi):
+                    result = Interval(-INF, INF, True)
+        
+        memo[key] = result
+        return result
+    
+    # Operands first, so visit only ever looks one level down
+    for node in postorder(tree):
+        visit(node)
+    return visit(tree)
+
+
+def split_interval(tree, name, lo, hi, pieces, variables=None):
+    """Evaluate tree over pieces equal parts of [lo, hi] of variable name"""
+    variables = dict(variables or {})
+    results = []
+    for i in range(pieces):
+        a = lo + (hi - lo) * i / pieces
+        b = hi if i == pieces - 1 else lo + (hi - lo) * (i + 1) / pieces
+        variables[name] = (a, b)
+        results.append((a, b, evaluate_interval(tree, variables)))
+    return results
+
+
+def defined_ranges(tree, name, lo, hi, pieces=64, window=None, depth=4):
+    """Merged sub-ranges of [lo, hi] where tree may be defined
+    
+    Everything outside the returned ranges is provably undefined, or, with
+    window=(low, high), provably outside that range of values. Pieces that
+    are only partly defined or visible are bisected depth more times, so
+    the ranges hug the domain boundary.
+    """
+    def hidden(result):
+        return result.empty or (window is not None and (
+            result.hi < window[0] or result.lo > window[1]))
+    
+    def straddles(result):
+        return result.partial or (window is not None and (
+            result.lo < window[0] or result.hi > window[1]))
+    
+    kept = []
+    stack = [(a, b, result, depth) for a, b, result
+             in reversed(split_interval(tree, name, lo, hi, pieces))]
+    while stack:
+        a, b, result, level = stack.pop()
+        if hidden(result):
+            continue
+        if level and straddles(result):
+            middle = (a + b) / 2
+            stack += [(low, high, evaluate_interval(tree, {name: (low, high)}),
+                       level - 1) for low, high in ((middle, b), (a, middle))]
+            continue
+        if kept and kept[-1][1] == a:
+            kept[-1][1] = b
+        else:
+            kept.append([a, b])
+    return [tuple(item) for item in kept]
+
+
+def function_range(tree, name, lo, hi, pieces=32, tolerance=0.01,
+                   max_evaluations=256):
+    """Guaranteed (min, max) of tree's finite values over [lo, hi]
+    
+    Pieces with unbounded enclosures (around poles, or overflowing) are
+    left out so an asymptote does not swamp the limits. The pieces holding
+    the extremes are bisected until each bound is within tolerance of a
+    value actually attained, or the evaluation budget runs out. Each bound
+    has its own budget of max_evaluations, so a slow minimum does not
+    leave the maximum unrefined. Returns None if no piece is bounded.
+    """
+    def enclose(a, b):
+        """Bounded enclosure over [a, b] and one over its midpoint, or None"""
+        result = evaluate_interval(tree, {name: (a, b)})
+        if not result.bounded:
+            return None
+        point = evaluate_interval(tree, {name: (a + b) / 2})
+        return result, point if point.bounded else None
+    
+    pieces = [(a, b, enclose(a, b)) for a, b, _ in
+              split_interval(tree, name, lo, hi, pieces)]
+    pieces = [(a, b, enclosures) for a, b, enclosures in pieces if enclosures]
+    if not pieces:
+        return None
+    
+    def tighten(sign):
+        """Branch and bound on the largest value of sign * tree"""
+        def upper(interval):
+            return interval.hi if sign > 0 else -interval.lo
+        
+        def lower(interval):
+            return interval.lo if sign > 0 else -interval.hi
+        
+        heap = []
+        attained = -INF
+        for a, b, (result, point) in pieces:
+            heap.append((-upper(result), a, b))
+            if point is not None:
+                attained = max(attained, lower(point))
+        heapq.heapify(heap)
+        
+        evaluations = 0
+        while evaluations < max_evaluations:
+            bound, a, b = heap[0]
+            scale = max(abs(attained), abs(bound), 1.0)
+            if -bound - attained <= tolerance * scale or b - a <= (hi - lo) * 1e-9:
+                break
+            heapq.heappop(heap)
+            middle = (a + b) / 2
+            for low, high in ((a, middle), (middle, b)):
+                evaluations += 2
+                enclosures = enclose(low, high)
+                if enclosures is None:
+                    continue
+                result, point = enclosures
+                heapq.heappush(heap, (-upper(result), low, high))
+                if point is not None:
+                    attained = max(attained, lower(point))
+            if not heap:
+                return sign * attained
+        return sign * -heap[0][0]
+    
+    return tighten(-1), tighten(1)
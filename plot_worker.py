@@ -0,0 +1,93 @@
+"""
+Background plot computation for the Tk GUI
+Samples are computed on a worker thread; only the artist update runs on
+the Tk main loop.
+"""
+
+import itertools
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PlotWorker:
+    """Runs plot sampling off the Tk main loop, newest request wins
+    
+    Every submit() on a channel (one per plot tab) gets a new generation
+    id. Queued work of older generations is cancelled, and results of
+    older generations that were already running are discarded.
+    """
+    
+    def __init__(self, root, max_workers=1, poll_interval=15):
+        self.root = root
+        self.poll_interval = poll_interval
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='plot')
+        self._counter = itertools.count(1)
+        self._generations = {}
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._results = queue.Queue()
+        self._pending = 0
+        self._polling = False
+    
+    def submit(self, channel, compute, render, on_error=None):
+        """Run compute() on the worker, then render(result) on the Tk thread"""
+        generation = next(self._counter)
+        with self._lock:
+            self._generations[channel] = generation
+            previous = self._futures.pop(channel, None)
+        if previous is not None and previous.cancel():
+            self._pending -= 1
+        
+        future = self._executor.submit(self._run, channel, generation,
+                                       compute, render, on_error)
+        with self._lock:
+            self._futures[channel] = future
+        self._pending += 1
+        self._schedule_poll()
+        return generation
+    
+    def is_current(self, channel, generation):
+        """Whether generation is still the newest request on channel"""
+        return self._generations.get(channel) == generation
+    
+    def shutdown(self):
+        """Drop queued work and stop accepting new requests"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _run(self, channel, generation, compute, render, on_error):
+        """Worker side: compute unless superseded, then hand back result"""
+        if not self.is_current(channel, generation):
+            self._results.put(None)
+            return
+        try:
+            result = compute()
+        except Exception as e:
+            self._results.put((channel, generation, on_error, e))
+        else:
+            self._results.put((channel, generation, render, result))
+    
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_interval, self._poll)
+    
+    def _poll(self):
+        """Tk side: apply finished results of the newest generations"""
+        self._polling = False
+        while True:
+            try:
+                item = self._results.get_nowait()
+            except queue.Empty:
+                break
+            
+            self._pending -= 1
+            if item is None:
+                continue
+            channel, generation, callback, value = item
+            if callback is not None and self.is_current(channel, generation):
+                callback(value)
+        
+        if self._pending > 0:
+            self._schedule_poll()
@@ -3,12 +3,387 @@ Plotting modules for different coordinate systems
 """
 
 import math
+import threading
+import time
+from collections import OrderedDict
+
+
+def stored_bytes(array):
+    """Bytes an array actually holds; broadcast axes cost nothing"""
+    size = array.itemsize
+    for length, stride in zip(array.shape, array.strides):
+        if stride:
+            size *= length
+    return size
+
+
+class SampleCache:
+    """Memory-bounded LRU of sampled plot data
+    
+    Keys are (plotter, normalized expression, ranges, num_points) and values
+    are tuples of read-only NumPy arrays, so an unchanged plot only needs a
+    redraw.
+    """
+    
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def get(self, key):
+        """Return cached arrays and mark them most recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+    
+    def put(self, key, arrays):
+        """Store arrays, evicting least recently used beyond the budget"""
+        size = sum(stored_bytes(array) for array in arrays)
+        if size > self.max_bytes:
+            return
+        for array in arrays:
+            array.flags.writeable = False
+        
+        with self._lock:
+            if key in self._entries:
+                self.bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (arrays, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self.bytes -= self._entries.popitem(last=False)[1][1]
+                self.evictions += 1
+    
+    def clear(self):
+        """Drop all entries and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = self.hits = self.misses = self.evictions = 0
+    
+    def stats(self):
+        """Counters for sizing the cache"""
+        return {'entries': len(self._entries), 'bytes': self.bytes,
+                'max_bytes': self.max_bytes, 'hits': self.hits,
+                'misses': self.misses, 'evictions': self.evictions}
+
+
+# Shared by every plotter, so tab switches and redraws reuse samples
+sample_cache = SampleCache()
+
+
+def adaptive_sample(evaluate, x_min, x_max, max_evaluations=500,
+                    initial_points=33, tolerance=0.002, jump_tolerance=0.05,
+                    min_width=None):
+    """Sample evaluate(x) coarsely, then bisect where the curve misbehaves
+    
+    An interval is split while its midpoint strays from the chord by more
+    than tolerance times the typical y range, or while it borders an
+    undefined region. Unresolved intervals that jump by more than
+    jump_tolerance are checked for discontinuities, which get a NaN so the
+    line breaks there. Never evaluates more than max_evaluations points.
+    """
+    import numpy as np
+    
+    if min_width is None:
+        min_width = (x_max - x_min) * 1e-6
+    
+    x = np.linspace(x_min, x_max, max(2, min(initial_points, max_evaluations)))
+    y = evaluate(x)
+    evaluations = x.size
+    
+    # Typical y range, ignoring the tails that poles blow up
+    finite = y[np.isfinite(y)]
+    scale = 1.0
+    if finite.size:
+        scale = float(np.percentile(finite, 95) - np.percentile(finite, 5))
+        scale = scale if scale > 0 else max(float(np.abs(finite).max()), 1.0)
+    
+    active = np.ones(x.size - 1, dtype=bool)
+    while evaluations < max_evaluations:
+        left = np.flatnonzero(active & (np.diff(x) > min_width))
+        if not left.size:
+            break
+        
+        budget = max_evaluations - evaluations
+        if left.size > budget:
+            # Spend what is left on the largest jumps first
+            jump = np.abs(y[left + 1] - y[left])
+            jump[np.isnan(jump)] = np.inf
+            left = np.sort(left[np.argsort(-jump, kind='stable')[:budget]])
+        
+        x_mid = (x[left] + x[left + 1]) / 2
+        y_mid = evaluate(x_mid)
+        evaluations += x_mid.size
+        
+        error = np.abs(y_mid - (y[left] + y[left + 1]) / 2)
+        undefined = np.isnan(y[left]) & np.isnan(y[left + 1]) & np.isnan(y_mid)
+        refine = ~(error <= tolerance * scale) & ~undefined
+        
+        active[left] = refine
+        active = np.insert(active, left + 1, refine)
+        x = np.insert(x, left + 1, x_mid)
+        y = np.insert(y, left + 1, y_mid)
+    
+    # Unresolved intervals with a large jump are discontinuities when the
+    # jump dwarfs both neighbours (steps) or reverses their direction
+    # beyond the typical range (poles such as tan(x) at pi/2)
+    dy = np.diff(y)
+    before = np.r_[np.nan, dy[:-1]]
+    after = np.r_[dy[1:], np.nan]
+    with np.errstate(invalid='ignore'):
+        neighbours = np.nan_to_num(np.fmax(np.abs(before), np.abs(after)))
+        step = np.abs(dy) > 10 * neighbours
+        pole = ((np.sign(dy) != np.sign(before)) &
+                (np.sign(dy) != np.sign(after)) &
+                (np.fmin(np.abs(y[:-1]), np.abs(y[1:])) > scale))
+        breaks = np.flatnonzero(active & (np.abs(dy) > jump_tolerance * scale)
+                                & (step | pole))
+    if breaks.size:
+        x = np.insert(x, breaks + 1, (x[breaks] + x[breaks + 1]) / 2)
+        y = np.insert(y, breaks + 1, np.nan)
+    
+    return x, y
+
+
+def adaptive_mesh(evaluate, x_range, y_range, max_vertices=4096,
+                  initial_points=9, tolerance=0.002, min_size=None,
+                  max_evaluations=None):
+    """Triangulated surface refined where it bends, for plot_trisurf
+    
+    Starts from an initial_points x initial_points grid. Every edge of the
+    Delaunay triangulation is checked at its midpoint; where the surface
+    strays from the edge's chord by more than tolerance times the typical
+    z range, the midpoint becomes a vertex and the mesh is triangulated
+    again. The largest errors are taken first once the max_vertices budget
+    runs short, and edges shorter than min_size are never split.
+    
+    Every retriangulation brings new edges to test, so evaluations run to
+    several times the vertex count; refinement stops before the next round
+    of midpoints would take them past max_evaluations, 5 * max_vertices by
+    default. Returns (x, y, z, triangles, evaluations) with triangles
+    touching undefined points left out.
+    """
+    import numpy as np
+    from matplotlib.tri import Triangulation
+    
+    if min_size is None:
+        min_size = max(x_range[1] - x_range[0], y_range[1] - y_range[0]) / 1024
+    if max_evaluations is None:
+        max_evaluations = 5 * max_vertices
+    
+    x, y = np.meshgrid(np.linspace(x_range[0], x_range[1], initial_points),
+                       np.linspace(y_range[0], y_range[1], initial_points))
+    x, y = x.ravel(), y.ravel()
+    z = evaluate(x, y)
+    evaluations = x.size
+    
+    # Typical z range, ignoring the tails that poles blow up
+    finite = z[np.isfinite(z)]
+    scale = 1.0
+    if finite.size:
+        low, high = np.percentile(finite, [5, 95])
+        scale = high - low or max(abs(high), 1.0)
+    limit = tolerance * scale
+    
+    # Midpoint error of every edge tested so far, by vertex pair
+    errors = {}
+    
+    while x.size < max_vertices:
+        edges = Triangulation(x, y).edges
+        keys = edges[:, 0].astype(np.int64) << 32 | edges[:, 1]
+        
+        untested = np.array([key not in errors for key in keys.tolist()],
+                            dtype=bool)
+        if evaluations + np.count_nonzero(untested) > max_evaluations:
+            break
+        if untested.any():
+            a, b = edges[untested].T
+            mid_x = (x[a] + x[b]) / 2
+            mid_y = (y[a] + y[b]) / 2
+            mid_z = evaluate(mid_x, mid_y)
+            evaluations += mid_z.size
+            
+            chord = (z[a] + z[b]) / 2
+            with np.errstate(invalid='ignore'):
+                error = np.abs(mid_z - chord)
+            # An edge into an undefined region is refined like a bad chord
+            defined = np.isfinite(np.stack([z[a], z[b], mid_z]))
+            error[defined.any(axis=0) & ~defined.all(axis=0)] = np.inf
+            error[~defined.any(axis=0)] = 0
+            too_short = np.hypot(x[b] - x[a], y[b] - y[a]) < min_size
+            error[too_short] = 0
+            errors.update(zip(keys[untested].tolist(),
+                              zip(error.tolist(), mid_x.tolist(),
+                                  mid_y.tolist(), mid_z.tolist())))
+        
+        tested = [errors[key] for key in keys.tolist()]
+        error = np.array([item[0] for item in tested])
+        split = np.nonzero(error > limit)[0]
+        if not split.size:
+            break
+        
+        # Largest errors first when the vertex budget runs short
+        split = split[np.argsort(-error[split], kind='stable')]
+        split = split[:max_vertices - x.size]
+        points = np.array([tested[index][1:] for index in split.tolist()])
+        x = np.concatenate([x, points[:, 0]])
+        y = np.concatenate([y, points[:, 1]])
+        z = np.concatenate([z, points[:, 2]])
+    
+    triangles = Triangulation(x, y).triangles
+    triangles = triangles[np.isfinite(z[triangles]).all(axis=1)]
+    return x, y, z, triangles, evaluations
+
+
+def implicit_segments(evaluate, x_range, y_range, coarse=32, depth=4,
+                      enclose=None):
+    """Marching squares for f(x, y) = 0 on a quadtree-refined grid
+    
+    Corners of a coarse x coarse grid are evaluated (coarse is rounded up
+    to a power of two), then only cells whose corner signs differ are split
+    into quarters, depth times, and contoured. A final cell whose centre
+    value lies outside the range of its corner values changes sign across
+    a pole rather than a zero, and is dropped; that costs one evaluation
+    per final cell. With enclose(x0, x1, y0, y1) returning guaranteed
+    (low, high) bounds of f over a cell, or None where f is undefined
+    throughout, regions without a zero are also pruned top-down before any
+    point evaluation, and final cells with unbounded f are dropped.
+    Returns (segments, evaluations); segments has shape (n, 2, 2).
+    """
+    import numpy as np
+    
+    coarse = 1 << max(int(coarse) - 1, 0).bit_length()
+    step = 1 << depth
+    size = coarse * step
+    x0, y0 = x_range[0], y_range[0]
+    dx = (x_range[1] - x0) / size
+    dy = (y_range[1] - y0) / size
+    
+    # Values on the finest lattice, filled in only where needed
+    lattice = np.full((size + 1, size + 1), np.nan)
+    known = np.zeros((size + 1, size + 1), dtype=bool)
+    evaluations = 0
+    
+    def fetch(i, j):
+        nonlocal evaluations
+        need = ~known[j, i]
+        if need.any():
+            flat = np.unique(j[need] * (size + 1) + i[need])
+            jj, ii = np.divmod(flat, size + 1)
+            lattice[jj, ii] = evaluate(x0 + ii * dx, y0 + jj * dy)
+            known[jj, ii] = True
+            evaluations += flat.size
+        return lattice[j, i]
+    
+    def may_hold_zero(i, j, width, bounded=False):
+        keep = []
+        for a, b in zip(i.tolist(), j.tolist()):
+            bounds = enclose(x0 + a * dx, x0 + (a + width) * dx,
+                             y0 + b * dy, y0 + (b + width) * dy)
+            keep.append(bounds is not None and bounds[0] <= 0 <= bounds[1] and
+                        not (bounded and math.isinf(bounds[1] - bounds[0])))
+        return np.array(keep, dtype=bool)
+    
+    def quarter(i, j, width):
+        half = width // 2
+        return (np.concatenate([i, i + half, i, i + half]),
+                np.concatenate([j, j, j + half, j + half]), half)
+    
+    # Cells by lower-left lattice corner and width
+    if enclose is None:
+        i, j = np.meshgrid(np.arange(coarse) * step, np.arange(coarse) * step)
+        i, j, width = i.ravel(), j.ravel(), step
+    else:
+        i, j, width = np.zeros(1, dtype=int), np.zeros(1, dtype=int), size
+        while width > step and i.size:
+            keep = may_hold_zero(i, j, width)
+            i, j, width = quarter(i[keep], j[keep], width)
+    
+    while True:
+        values = np.stack([fetch(i, j), fetch(i + width, j),
+                           fetch(i + width, j + width), fetch(i, j + width)])
+        positive = values > 0
+        crossing = (np.isfinite(values).all(axis=0) & positive.any(axis=0) &
+                    ~positive.all(axis=0))
+        i, j, values = i[crossing], j[crossing], values[:, crossing]
+        if width == 1 or not i.size:
+            break
+        i, j, width = quarter(i, j, width)
+    
+    if enclose is not None and i.size:
+        keep = may_hold_zero(i, j, width, bounded=True)
+        i, j, values = i[keep], j[keep], values[:, keep]
+    
+    if i.size:
+        # Near a pole |f| grows past the corners towards it; across a
+        # zero the centre stays about the corners' mean
+        centre = evaluate(x0 + (i + 0.5) * dx, y0 + (j + 0.5) * dy)
+        evaluations += i.size
+        low, high = values.min(axis=0), values.max(axis=0)
+        slack = 1e-6 * (high - low)
+        keep = (centre >= low - slack) & (centre <= high + slack)
+        i, j, values = i[keep], j[keep], values[:, keep]
+    
+    # Crossing point on each edge: bottom, right, top, left
+    corners_x = x0 + np.stack([i, i + 1, i + 1, i]) * dx
+    corners_y = y0 + np.stack([j, j, j + 1, j + 1]) * dy
+    ends = [1, 2, 3, 0]
+    with np.errstate(all='ignore'):
+        t = values / (values - values[ends])
+    points = np.stack([corners_x + t * (corners_x[ends] - corners_x),
+                       corners_y + t * (corners_y[ends] - corners_y)], axis=-1)
+    crossed = (values > 0) != (values[ends] > 0)
+    
+    # Two crossed edges: one segment between them
+    pair = crossed.sum(axis=0) == 2
+    first, second = np.argsort(~crossed[:, pair], axis=0, kind='stable')[:2]
+    cells = np.nonzero(pair)[0]
+    segments = [np.stack([points[first, cells], points[second, cells]], axis=1)]
+    
+    # Saddles: the corner average decides which corners are joined
+    saddle = np.nonzero(crossed.sum(axis=0) == 4)[0]
+    joined = (values[:, saddle].mean(axis=0) > 0) == (values[1, saddle] > 0)
+    for edges, mask in (((3, 0), joined), ((1, 2), joined),
+                        ((0, 1), ~joined), ((2, 3), ~joined)):
+        cells = saddle[mask]
+        segments.append(np.stack([points[edges[0], cells],
+                                  points[edges[1], cells]], axis=1))
+    
+    return np.concatenate(segments).reshape(-1, 2, 2), evaluations
 
 
 class BasePlotter:
     """Base class for all plotters"""
     
+    # Surface grids: 'float32' halves memory, max bytes bounds each row tile
+    grid_dtype = 'float64'
+    grid_max_bytes = 64 * 1024 * 1024
+    
+    # Worker processes or threads for large grids: 1 disables, None uses
+    # every core; processes win when both are enabled
+    grid_workers = 1
+    grid_threads = 1
+    parallel_min_points = 500_000
+    
+    # Grids this large use the Numba loop kernel when Numba is installed;
+    # the finest surface LOD stage, 512 x 512, is the first to qualify
+    jit_min_points = 512 * 512
+    
     def __init__(self):
+        # Axes of the last successful plot, reused by the next one
+        self.ax = None
+        self.grid_timing = None
         self.parser = None
         try:
             from expression_parser import ExpressionParser
@@ -26,197 +401,668 @@ class BasePlotter:
             for var, value in variables.items():
                 expr = expr.replace(var, str(value))
             return eval(expr, {"__builtins__": {}, "math": math})
+    
+    def safe_eval_array(self, expression, variables):
+        """Evaluate expression over NumPy arrays, NaN where undefined"""
+        import numpy as np
+        
+        if self.parser:
+            return self.parser.compile(expression).evaluate_array(variables)
+        
+        # Fallback evaluation, one point at a time
+        names = list(variables)
+        arrays = np.broadcast_arrays(*[np.asarray(variables[name], dtype=float)
+                                       for name in names])
+        result = np.empty(arrays[0].shape)
+        for index in np.ndindex(result.shape):
+            try:
+                result[index] = self.safe_eval(expression, {
+                    name: array[index] for name, array in zip(names, arrays)
+                })
+            except:
+                result[index] = np.nan
+        return result
+    
+    def evaluate_grid(self, expression, x_name, x_values, y_name, y_values):
+        """Evaluate over the grid of x_values (columns) by y_values (rows)"""
+        import numpy as np
+        
+        if self.parser:
+            from grid_evaluator import select_evaluator
+            points = np.size(x_values) * np.size(y_values)
+            evaluator = select_evaluator(
+                points, self.grid_workers, self.grid_threads,
+                self.grid_max_bytes, self.grid_dtype,
+                self.parallel_min_points, self.jit_min_points)
+            
+            started = time.perf_counter()
+            Z = evaluator.evaluate(self.parser.compile(expression),
+                                   x_name, x_values, y_name, y_values)
+            # (backend, points, seconds) of the last grid, for timing output
+            self.grid_timing = (evaluator.name, points,
+                                time.perf_counter() - started)
+            return Z
+        
+        return self.safe_eval_array(expression, {
+            x_name: np.asarray(x_values).reshape(1, -1),
+            y_name: np.asarray(y_values).reshape(-1, 1)
+        }).astype(self.grid_dtype)
+    
+    def cached_samples(self, expression, parameters, compute):
+        """Return compute() results, reusing them for identical requests"""
+        if self.parser:
+            expression = self.parser.compile(expression).normalized
+        key = (type(self).__name__, expression, parameters)
+        
+        arrays = sample_cache.get(key)
+        if arrays is None:
+            arrays = tuple(compute())
+            sample_cache.put(key, arrays)
+        return arrays
+    
+    def reuses_axes(self, figure):
+        """Whether the last plot's axes are still live in figure"""
+        return self.ax is not None and self.ax in figure.axes
+    
+    def add_3d_axes(self, figure):
+        """Add 3D axes filling figure"""
+        # Importing mplot3d registers the '3d' projection
+        import mpl_toolkits.mplot3d  # noqa: F401
+        return figure.add_subplot(111, projection='3d')
+    
+    def plot_error(self, figure, error):
+        """Replace the figure with an error message"""
+        self.ax = None
+        figure.clear()
+        ax = figure.add_subplot(111)
+        ax.text(0.5, 0.5, f'Error plotting {self.name}:\n{str(error)}', 
+               ha='center', va='center', transform=ax.transAxes,
+               bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
+        ax.set_title(self.error_title)
 
 
 class Plotter2D(BasePlotter):
     """2D function plotter"""
     
-    def plot(self, figure, expression, x_min=-10, x_max=10, num_points=500):
+    name = '2D'
+    error_title = '2D Plot Error'
+    
+    def __init__(self):
+        super().__init__()
+        # Artists and settings of the last plot, for viewport resampling
+        self.line = None
+        self.expression = None
+        self.adaptive = False
+        # schedule(compute, draw) for viewport resampling, None to run inline
+        self.schedule = None
+    
+    def sample(self, expression, x_min=-10, x_max=10, num_points=500,
+               adaptive=False, cache=True, limits=True):
+        """Sample 2D function, returning x values, y values and y limits
+        
+        With adaptive=True, num_points caps the number of evaluations
+        instead of fixing a uniform grid. With cache=False the samples are
+        neither looked up nor stored, for throwaway viewports while panning.
+        Stretches of x that interval arithmetic proves undefined get no
+        samples; their budget goes to the rest. The y limits from
+        y_limits(), or an empty array, are computed here too when limits
+        is set, so all of the interval arithmetic runs off the Tk thread.
+        A reversed range is sampled like the forward one.
+        """
+        import numpy as np
+        
+        low, high = min(x_min, x_max), max(x_min, x_max)
+        
+        def compute():
+            y_limits = self.y_limits(expression, low, high) if limits \
+                       else None
+            y_limits = np.array(y_limits if y_limits else [], dtype=float)
+            
+            ranges = self.sampled_ranges(expression, low, high)
+            if not ranges:
+                return np.array([low, high]), np.full(2, np.nan), y_limits
+            
+            # Share the points between ranges by length, NaN-separated
+            total = sum(b - a for a, b in ranges)
+            x_parts = []
+            y_parts = []
+            for a, b in ranges:
+                count = max(int(num_points * (b - a) / total), 2) if total \
+                        else num_points
+                if adaptive and b > a:
+                    x_values, y_values = adaptive_sample(
+                        lambda x: self.safe_eval_array(expression, {'x': x}),
+                        a, b, max_evaluations=count)
+                else:
+                    # Generate x values
+                    x_values = np.linspace(a, b, count)
+                    
+                    # Calculate y values
+                    y_values = self.safe_eval_array(expression,
+                                                    {'x': x_values})
+                if x_parts:
+                    x_parts.append(np.array([a]))
+                    y_parts.append(np.array([np.nan]))
+                x_parts.append(x_values)
+                y_parts.append(y_values)
+            return np.concatenate(x_parts), np.concatenate(y_parts), y_limits
+        
+        if not cache:
+            return compute()
+        return self.cached_samples(expression, (low, high, num_points,
+                                                adaptive, limits), compute)
+    
+    def sampled_ranges(self, expression, x_min, x_max):
+        """Parts of [x_min, x_max] that may hold defined points"""
+        if not self.parser or not x_min < x_max:
+            return [(x_min, x_max)]
+        from interval_arithmetic import defined_ranges
+        
+        try:
+            tree = self.parser.compile(expression).tree
+            return defined_ranges(tree, 'x', x_min, x_max)
+        except ValueError:
+            # Undefined names: let evaluation report the error
+            return [(x_min, x_max)]
+    
+    def y_limits(self, expression, x_min, x_max):
+        """Padded y-range of expression over [x_min, x_max], or None
+        
+        The range comes from interval arithmetic rather than the samples,
+        so it is guaranteed and a pole's huge samples cannot stretch it.
+        """
+        if not self.parser or not x_min < x_max:
+            return None
+        from interval_arithmetic import function_range
+        
+        try:
+            tree = self.parser.compile(expression).tree
+            bounds = function_range(tree, 'x', x_min, x_max)
+        except ValueError:
+            return None
+        if bounds is None:
+            return None
+        y_min, y_max = bounds
+        y_range = y_max - y_min
+        if y_range > 0:
+            return y_min - 0.1 * y_range, y_max + 0.1 * y_range
+        return None
+    
+    def plot(self, figure, expression, x_min=-10, x_max=10, num_points=500,
+             adaptive=False):
         """Plot 2D function"""
         try:
-            import numpy as np
-            
+            samples = self.sample(expression, x_min, x_max, num_points,
+                                  adaptive)
+            self.render(figure, expression, samples, x_min, x_max, adaptive)
+        except Exception as e:
+            # Create error plot
+            self.line = None
+            self.plot_error(figure, e)
+    
+    def render(self, figure, expression, samples, x_min=-10, x_max=10,
+               adaptive=False):
+        """Draw samples from sample() into figure"""
+        x_values, y_values, y_limits = samples
+        
+        # Set first: autoscaling below may already re-sample through
+        # on_xlim_changed, which must see this expression
+        self.expression = expression
+        self.adaptive = adaptive
+        
+        new_axes = not self.reuses_axes(figure)
+        if not new_axes:
+            # Update the existing line in place
+            ax = self.ax
+            self.line.set_data(x_values, y_values)
+        else:
             figure.clear()
-            ax = figure.add_subplot(111)
-            
-            # Generate x values
-            x_values = np.linspace(x_min, x_max, num_points)
-            y_values = []
-            
-            # Calculate y values
-            for x in x_values:
-                try:
-                    y = self.safe_eval(expression, {'x': x})
-                    y_values.append(y)
-                except:
-                    y_values.append(np.nan)
+            ax = self.ax = figure.add_subplot(111)
             
             # Plot
-            ax.plot(x_values, y_values, 'b-', linewidth=2)
+            self.line, = ax.plot(x_values, y_values, 'b-', linewidth=2)
             ax.grid(True, alpha=0.3)
             ax.set_xlabel('x')
             ax.set_ylabel('f(x)')
-            ax.set_title(f'f(x) = {expression}')
-            
-            # Set reasonable y limits
-            """valid_y = [y for y in y_values if not np.isnan(y) and not np.isinf(y)]
-            if valid_y:
-                y_min, y_max = min(valid_y), max(valid_y)
-                y_range = y_max - y_min
-                if y_range > 0:
-                    ax.set_ylim(y_min - 0.1 * y_range, y_max + 0.1 * y_range)"""
-            
-            #figure.tight_layout()
+        
+        ax.set_xlim(x_min, x_max, emit=False)
+        if new_axes:
+            # Re-sample whenever pan/zoom changes the visible x-interval
+            ax.callbacks.connect('xlim_changed', self.on_xlim_changed)
+        ax.set_title(f'f(x) = {expression}')
+        
+        # Set reasonable y limits
+        if not len(y_limits):
+            # An earlier set_ylim turned y autoscaling off
+            ax.set_autoscaley_on(True)
+            ax.relim()
+            ax.autoscale_view(scalex=False)
+        else:
+            ax.set_ylim(*y_limits)
+        
+        #figure.tight_layout()
+    
+    def on_xlim_changed(self, ax):
+        """Re-sample the visible x-interval at one point per pixel
+        
+        Sampling goes through schedule(compute, draw), which runs both at
+        once by default; the GUI sets it to its plot worker so the domain
+        pruning stays off the Tk thread. The y-limits are left alone: the
+        toolbar sets them after the x-limits.
+        """
+        if self.line is None or self.ax is not ax:
+            return
+        
+        limits = ax.get_xlim()
+        num_points = max(int(ax.bbox.width), 2)
+        expression, adaptive = self.expression, self.adaptive
+        
+        def compute():
+            return self.sample(expression, *limits, num_points, adaptive,
+                               cache=False, limits=False)
+        
+        def draw(samples):
+            # A newer plot or viewport may have replaced this one
+            if self.line is None or self.ax is not ax or \
+                    ax.get_xlim() != limits or self.expression != expression:
+                return
+            self.line.set_data(*samples[:2])
+            ax.figure.canvas.draw_idle()
+        
+        if self.schedule is None:
+            try:
+                samples = compute()
+            except Exception:
+                return
+            draw(samples)
+        else:
+            self.schedule(compute, draw)
+
+
+class PlotterImplicit(BasePlotter):
+    """Implicit curve plotter for relations such as x^2 + y^2 = 4"""
+    
+    name = 'implicit'
+    error_title = 'Implicit Plot Error'
+    
+    def __init__(self):
+        super().__init__()
+        self.lines = None
+    
+    def relation(self, expression):
+        """Turn 'lhs = rhs' into the expression lhs - rhs, zero on the curve"""
+        sides = expression.split('=')
+        if len(sides) == 1:
+            return expression
+        if len(sides) != 2 or not all(side.strip() for side in sides):
+            raise ValueError(f"Cannot parse relation: {expression}")
+        return f"({sides[0].strip()})-({sides[1].strip()})"
+    
+    def sample(self, expression, x_range=(-5, 5), y_range=(-5, 5),
+               num_points=32, depth=4, intervals=False):
+        """Sample relation, returning curve segments of shape (n, 2, 2)
+        
+        num_points is the coarse grid size; depth quadtree refinements
+        give the resolution of a num_points * 2^depth uniform grid.
+        intervals=True also skips cells whose interval enclosure excludes
+        zero; each enclosure is a pure-Python tree walk per cell, which
+        costs more than the vectorized corner evaluations it saves, so it
+        is off by default.
+        """
+        function = self.relation(expression)
+        
+        def compute():
+            enclose = None
+            if intervals and self.parser:
+                from interval_arithmetic import evaluate_interval
+                tree = self.parser.compile(function).tree
+                
+                def cell_bounds(x_low, x_high, y_low, y_high):
+                    bounds = evaluate_interval(tree, {'x': (x_low, x_high),
+                                                      'y': (y_low, y_high)})
+                    return None if bounds.empty else (bounds.lo, bounds.hi)
+                enclose = cell_bounds
             
+            segments, self.evaluations = implicit_segments(
+                lambda x, y: self.safe_eval_array(function, {'x': x, 'y': y}),
+                x_range, y_range, num_points, depth, enclose)
+            return (segments,)
+        
+        return self.cached_samples(function, (tuple(x_range), tuple(y_range),
+                                              num_points, depth, intervals),
+                                   compute)
+    
+    def plot(self, figure, expression, x_range=(-5, 5), y_range=(-5, 5),
+             num_points=32, depth=4):
+        """Plot implicit curve"""
+        try:
+            samples = self.sample(expression, x_range, y_range, num_points,
+                                  depth)
+            self.render(figure, expression, samples, x_range, y_range)
         except Exception as e:
             # Create error plot
+            self.lines = None
+            self.plot_error(figure, e)
+    
+    def render(self, figure, expression, samples, x_range=(-5, 5),
+               y_range=(-5, 5)):
+        """Draw samples from sample() into figure"""
+        from matplotlib.collections import LineCollection
+        
+        segments, = samples
+        
+        if self.reuses_axes(figure):
+            # Swap the segments of the existing collection
+            ax = self.ax
+            self.lines.set_segments(segments)
+        else:
             figure.clear()
-            ax = figure.add_subplot(111)
-            ax.text(0.5, 0.5, f'Error plotting 2D:\n{str(e)}', 
-                   ha='center', va='center', transform=ax.transAxes,
-                   bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
-            ax.set_title('2D Plot Error')
+            ax = self.ax = figure.add_subplot(111)
+            
+            # Plot
+            self.lines = LineCollection(segments, colors='b', linewidths=2)
+            ax.add_collection(self.lines)
+            ax.grid(True, alpha=0.3)
+            ax.set_xlabel('x')
+            ax.set_ylabel('y')
+            ax.set_aspect('equal', adjustable='box')
+        
+        ax.set_xlim(*x_range)
+        ax.set_ylim(*y_range)
+        if '=' not in expression:
+            expression = f'{expression} = 0'
+        ax.set_title(expression)
+
+
+class SurfacePlotter(BasePlotter):
+    """Base class for surface plotters with level-of-detail switching
+    
+    Every rendered grid or mesh of the current expression is kept as a
+    level. While the 3D axes are being rotated the coarsest level is shown,
+    and the finest comes back on release.
+    """
+    
+    # Grid sizes per side for progressive refinement
+    lod_stages = (32, 128, 512)
+    
+    def __init__(self):
+        super().__init__()
+        self.surface = None
+        self.expression = None
+        self.levels = {}
+        self.rotating = False
+        self._canvas = None
+    
+    def remember_level(self, figure, expression, samples):
+        """Keep samples as a level of expression and watch for rotation"""
+        if expression != self.expression or any(
+                len(level) != len(samples) for level in self.levels.values()):
+            # New expression, or switched between grids and meshes
+            self.expression = expression
+            self.levels = {}
+        self.levels[samples[2].size] = samples
+        
+        if self._canvas is not figure.canvas:
+            self._canvas = figure.canvas
+            figure.canvas.mpl_connect('button_press_event', self.on_press)
+            figure.canvas.mpl_connect('button_release_event', self.on_release)
+    
+    def on_press(self, event):
+        """Drop to the coarsest level while the axes rotate"""
+        if (self.ax is None or event.inaxes is not self.ax or
+                len(self.levels) < 2):
+            return
+        self.rotating = True
+        self.render(self.ax.figure, self.expression,
+                    self.levels[min(self.levels)])
+        event.canvas.draw_idle()
+    
+    def on_release(self, event):
+        """Restore the finest level once rotation ends"""
+        if not self.rotating:
+            return
+        self.rotating = False
+        if self.ax is not None and self.levels:
+            self.render(self.ax.figure, self.expression,
+                        self.levels[max(self.levels)])
+            event.canvas.draw_idle()
 
 
-class Plotter3D(BasePlotter):
+class Plotter3D(SurfacePlotter):
     """3D surface plotter"""
     
-    def plot(self, figure, expression, x_range=(-5, 5), y_range=(-5, 5), num_points=50):
-        """Plot 3D surface"""
-        try:
-            import numpy as np
-            from mpl_toolkits.mplot3d import Axes3D
+    name = '3D'
+    error_title = '3D Plot Error'
+    
+    # Vertex cap and relative midpoint tolerance of adaptive meshes
+    mesh_max_vertices = 8000
+    mesh_tolerance = 0.002
+    
+    def __init__(self):
+        super().__init__()
+        self.colorbar = None
+        self.evaluations = 0
+    
+    def sample(self, expression, x_range=(-5, 5), y_range=(-5, 5), num_points=50,
+               adaptive=False):
+        """Sample 3D surface, returning X, Y and Z grids
+        
+        With adaptive, returns a triangulated mesh (x, y, z, triangles)
+        instead, refined where the surface bends and capped at num_points^2
+        or mesh_max_vertices vertices, whichever is fewer.
+        """
+        import numpy as np
+        
+        if adaptive:
+            max_vertices = min(num_points ** 2, self.mesh_max_vertices)
             
-            figure.clear()
-            ax = figure.add_subplot(111, projection='3d')
-            
-            # Generate meshgrid
-            x = np.linspace(x_range[0], x_range[1], num_points)
-            y = np.linspace(y_range[0], y_range[1], num_points)
-            X, Y = np.meshgrid(x, y)
-            
-            # Calculate Z values
-            Z = np.zeros_like(X)
-            for i in range(X.shape[0]):
-                for j in range(X.shape[1]):
-                    try:
-                        Z[i, j] = self.safe_eval(expression, {'x': X[i, j], 'y': Y[i, j]})
-                    except:
-                        Z[i, j] = np.nan
+            def compute_mesh():
+                x, y, z, triangles, self.evaluations = adaptive_mesh(
+                    lambda x, y: self.safe_eval_array(expression,
+                                                      {'x': x, 'y': y}),
+                    x_range, y_range, max_vertices,
+                    tolerance=self.mesh_tolerance)
+                return x, y, z, triangles
             
-            # Plot surface
-            surf = ax.plot_surface(X, Y, Z, cmap='viridis', alpha=0.8)
-            ax.set_xlabel('x')
-            ax.set_ylabel('y')
-            ax.set_zlabel('f(x,y)')
-            ax.set_title(f'f(x,y) = {expression}')
+            return self.cached_samples(expression, (tuple(x_range),
+                                                    tuple(y_range),
+                                                    max_vertices,
+                                                    self.mesh_tolerance),
+                                       compute_mesh)
+        
+        def compute():
+            x = np.linspace(x_range[0], x_range[1], num_points,
+                            dtype=self.grid_dtype)
+            y = np.linspace(y_range[0], y_range[1], num_points,
+                            dtype=self.grid_dtype)
             
-            # Add colorbar
-            figure.colorbar(surf, ax=ax, shrink=0.5)
+            # Calculate Z values in row tiles
+            Z = self.evaluate_grid(expression, 'x', x, 'y', y)
             
+            # Broadcast views instead of a materialized meshgrid
+            X, Y = np.broadcast_arrays(x[None, :], y[:, None])
+            return X, Y, Z
+        
+        return self.cached_samples(expression, (tuple(x_range), tuple(y_range),
+                                                num_points, self.grid_dtype),
+                                   compute)
+    
+    def plot(self, figure, expression, x_range=(-5, 5), y_range=(-5, 5), num_points=50,
+             adaptive=False):
+        """Plot 3D surface"""
+        try:
+            samples = self.sample(expression, x_range, y_range, num_points,
+                                  adaptive)
+            self.render(figure, expression, samples)
         except Exception as e:
             # Create error plot
+            self.plot_error(figure, e)
+    
+    def render(self, figure, expression, samples):
+        """Draw samples from sample() into figure"""
+        if self.reuses_axes(figure):
+            # Swap only the surface collection
+            ax = self.ax
+            self.surface.remove()
+        else:
             figure.clear()
-            ax = figure.add_subplot(111)
-            ax.text(0.5, 0.5, f'Error plotting 3D:\n{str(e)}', 
-                   ha='center', va='center', transform=ax.transAxes,
-                   bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
-            ax.set_title('3D Plot Error')
+            ax = self.ax = self.add_3d_axes(figure)
+            ax.set_xlabel('x')
+            ax.set_ylabel('y')
+            ax.set_zlabel('f(x,y)')
+            self.colorbar = None
+        
+        if len(samples) == 4:
+            # Adaptive mesh
+            from matplotlib.tri import Triangulation
+            
+            X, Y, Z, triangles = samples
+            self.surface = ax.plot_trisurf(Triangulation(X, Y, triangles), Z,
+                                           cmap='viridis', alpha=0.8)
+        else:
+            # Plot surface
+            X, Y, Z = samples
+            self.surface = ax.plot_surface(X, Y, Z, cmap='viridis', alpha=0.8,
+                                           rcount=Z.shape[0], ccount=Z.shape[1])
+        ax.auto_scale_xyz(X, Y, Z, had_data=False)
+        ax.set_title(f'f(x,y) = {expression}')
+        self.remember_level(figure, expression, samples)
+        
+        # Add colorbar
+        if self.colorbar is None:
+            self.colorbar = figure.colorbar(self.surface, ax=ax, shrink=0.5)
+        else:
+            self.colorbar.update_normal(self.surface)
 
 
 class PlotterPolar(BasePlotter):
     """Polar coordinate plotter"""
     
-    def plot(self, figure, expression, theta_range=(0, 2*math.pi), num_points=1000):
-        """Plot polar function"""
-        try:
-            import numpy as np
-            
-            figure.clear()
-            ax = figure.add_subplot(111, projection='polar')
-            
+    name = 'polar'
+    error_title = 'Polar Plot Error'
+    
+    def __init__(self):
+        super().__init__()
+        self.line = None
+    
+    def sample(self, expression, theta_range=(0, 2*math.pi), num_points=1000):
+        """Sample polar function, returning theta and r values"""
+        import numpy as np
+        
+        def compute():
             # Generate theta values
             theta_values = np.linspace(theta_range[0], theta_range[1], num_points)
-            r_values = []
             
             # Calculate r values
-            for theta in theta_values:
-                try:
-                    r = self.safe_eval(expression, {'t': theta, 'theta': theta})
-                    r_values.append(r)
-                except:
-                    r_values.append(np.nan)
-            
-            # Plot
-            ax.plot(theta_values, r_values, 'b-', linewidth=2)
-            ax.set_title(f'r(θ) = {expression}')
-            ax.grid(True)
-            
+            r_values = self.safe_eval_array(expression, {'t': theta_values,
+                                                         'theta': theta_values})
+            return theta_values, r_values
+        
+        return self.cached_samples(expression, (tuple(theta_range), num_points),
+                                   compute)
+    
+    def plot(self, figure, expression, theta_range=(0, 2*math.pi), num_points=1000):
+        """Plot polar function"""
+        try:
+            samples = self.sample(expression, theta_range, num_points)
+            self.render(figure, expression, samples)
         except Exception as e:
             # Create error plot
+            self.plot_error(figure, e)
+    
+    def render(self, figure, expression, samples):
+        """Draw samples from sample() into figure"""
+        theta_values, r_values = samples
+        
+        if self.reuses_axes(figure):
+            # Update the existing line in place
+            ax = self.ax
+            self.line.set_data(theta_values, r_values)
+            ax.relim()
+            ax.autoscale_view()
+        else:
             figure.clear()
-            ax = figure.add_subplot(111)
-            ax.text(0.5, 0.5, f'Error plotting polar:\n{str(e)}', 
-                   ha='center', va='center', transform=ax.transAxes,
-                   bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
-            ax.set_title('Polar Plot Error')
+            ax = self.ax = figure.add_subplot(111, projection='polar')
+            
+            # Plot
+            self.line, = ax.plot(theta_values, r_values, 'b-', linewidth=2)
+            ax.grid(True)
+        
+        ax.set_title(f'r(θ) = {expression}')
 
 
-class PlotterSpherical(BasePlotter):
+class PlotterSpherical(SurfacePlotter):
     """Spherical coordinate plotter"""
     
+    name = 'spherical'
+    error_title = 'Spherical Plot Error'
+    
+    def sample(self, expression, theta_range=(0, math.pi), phi_range=(0, 2*math.pi), num_points=30):
+        """Sample spherical function, returning Cartesian X, Y and Z grids"""
+        import numpy as np
+        
+        def compute():
+            # Generate spherical coordinates, theta along columns, phi along rows
+            theta = np.linspace(theta_range[0], theta_range[1], num_points,
+                                dtype=self.grid_dtype)
+            phi = np.linspace(phi_range[0], phi_range[1], num_points,
+                              dtype=self.grid_dtype)
+            
+            # Calculate r values in row tiles
+            R = self.evaluate_grid(expression, 'theta', theta, 'phi', phi)
+            R[np.isnan(R)] = 1  # Default radius
+            
+            # Convert to Cartesian coordinates, broadcasting 1-D factors
+            sin_theta = np.sin(theta)[None, :]
+            X = R * sin_theta
+            Y = X * np.sin(phi)[:, None]
+            X *= np.cos(phi)[:, None]
+            R *= np.cos(theta)[None, :]
+            return X, Y, R
+        
+        return self.cached_samples(expression, (tuple(theta_range),
+                                                tuple(phi_range), num_points,
+                                                self.grid_dtype),
+                                   compute)
+    
     def plot(self, figure, expression, theta_range=(0, math.pi), phi_range=(0, 2*math.pi), num_points=30):
         """Plot spherical function"""
         try:
-            import numpy as np
-            from mpl_toolkits.mplot3d import Axes3D
-            
+            samples = self.sample(expression, theta_range, phi_range,
+                                  num_points)
+            self.render(figure, expression, samples)
+        except Exception as e:
+            # Create error plot
+            self.plot_error(figure, e)
+    
+    def render(self, figure, expression, samples):
+        """Draw samples from sample() into figure"""
+        import numpy as np
+        
+        X, Y, Z = samples
+        
+        if self.reuses_axes(figure):
+            # Swap only the surface collection
+            ax = self.ax
+            self.surface.remove()
+        else:
             figure.clear()
-            ax = figure.add_subplot(111, projection='3d')
-            
-            # Generate spherical coordinates
-            theta = np.linspace(theta_range[0], theta_range[1], num_points)
-            phi = np.linspace(phi_range[0], phi_range[1], num_points)
-            THETA, PHI = np.meshgrid(theta, phi)
-            
-            # Calculate r values
-            R = np.zeros_like(THETA)
-            for i in range(THETA.shape[0]):
-                for j in range(THETA.shape[1]):
-                    try:
-                        R[i, j] = self.safe_eval(expression, {
-                            'theta': THETA[i, j], 
-                            'phi': PHI[i, j]
-                        })
-                    except:
-                        R[i, j] = 1  # Default radius
-            
-            # Convert to Cartesian coordinates
-            X = R * np.sin(THETA) * np.cos(PHI)
-            Y = R * np.sin(THETA) * np.sin(PHI)
-            Z = R * np.cos(THETA)
-            
-            # Plot surface
-            surf = ax.plot_surface(X, Y, Z, cmap='plasma', alpha=0.8)
+            ax = self.ax = self.add_3d_axes(figure)
             ax.set_xlabel('X')
             ax.set_ylabel('Y')
             ax.set_zlabel('Z')
-            ax.set_title(f'r(θ,φ) = {expression}')
-            
-            # Make axes equal
-            max_range = np.array([X.max()-X.min(), Y.max()-Y.min(), Z.max()-Z.min()]).max() / 2.0
-            mid_x = (X.max()+X.min()) * 0.5
-            mid_y = (Y.max()+Y.min()) * 0.5
-            mid_z = (Z.max()+Z.min()) * 0.5
-            ax.set_xlim(mid_x - max_range, mid_x + max_range)
-            ax.set_ylim(mid_y - max_range, mid_y + max_range)
-            ax.set_zlim(mid_z - max_range, mid_z + max_range)
-            
-        except Exception as e:
-            # Create error plot
-            figure.clear()
-            ax = figure.add_subplot(111)
-            ax.text(0.5, 0.5, f'Error plotting spherical:\n{str(e)}', 
-                   ha='center', va='center', transform=ax.transAxes,
-                   bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
-            ax.set_title('Spherical Plot Error')
+        
+        # Plot surface
+        self.surface = ax.plot_surface(X, Y, Z, cmap='plasma', alpha=0.8,
+                                       rcount=Z.shape[0], ccount=Z.shape[1])
+        ax.set_title(f'r(θ,φ) = {expression}')
+        self.remember_level(figure, expression, samples)
+        
+        # Make axes equal
+        max_range = np.array([X.max()-X.min(), Y.max()-Y.min(), Z.max()-Z.min()]).max() / 2.0
+        mid_x = (X.max()+X.min()) * 0.5
+        mid_y = (Y.max()+Y.min()) * 0.5
+        mid_z = (Z.max()+Z.min()) * 0.5
+        ax.set_xlim(mid_x - max_range, mid_x + max_range)
+        ax.set_ylim(mid_y - max_range, mid_y + max_range)
+        ax.set_zlim(mid_z - max_range, mid_z + max_range)
@@ -0,0 +1,113 @@
+"""
+Startup timing for the GUI
+Times every import like python -X importtime, plus named milestones such
+as the first window. Enabled with: python ModernMain.py --startup-report
+"""
+
+import sys
+import threading
+import time
+
+
+class _TimedLoader:
+    """Wraps a module loader to time its exec_module"""
+    
+    def __init__(self, loader, report):
+        self._loader = loader
+        self._report = report
+    
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+    
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+    
+    def exec_module(self, module):
+        self._report.enter()
+        started = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._report.leave(module.__name__,
+                               time.perf_counter() - started)
+
+
+class StartupReport:
+    """Meta path finder recording import times and startup milestones
+    
+    Only modules imported after install() are seen; everything the
+    interpreter or earlier imports already loaded costs nothing here.
+    """
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.imports = []
+        self.milestones = []
+        self._local = threading.local()
+    
+    def install(self):
+        """Start timing imports, returns self"""
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+        return self
+    
+    def uninstall(self):
+        """Stop timing imports"""
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+    
+    def find_spec(self, name, path=None, target=None):
+        """Find name with the remaining finders and time its loader"""
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        
+        if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+            spec.loader = _TimedLoader(spec.loader, self)
+        return spec
+    
+    def enter(self):
+        """A module starts executing on this thread"""
+        stack = self._local.__dict__.setdefault('stack', [])
+        stack.append(0.0)
+    
+    def leave(self, name, seconds):
+        """A module finished; its time less nested imports is its own"""
+        stack = self._local.stack
+        nested = stack.pop()
+        if stack:
+            stack[-1] += seconds
+        self.imports.append((name, seconds - nested, seconds, len(stack)))
+    
+    def mark(self, label):
+        """Record a milestone at the current time"""
+        self.milestones.append((label, time.perf_counter() - self.started))
+    
+    def lines(self, min_seconds=0.001):
+        """Report lines, imports in -X importtime order then milestones"""
+        lines = ["import time: self [us] | cumulative | imported package"]
+        for name, own, cumulative, depth in self.imports:
+            if cumulative >= min_seconds:
+                lines.append(f"import time: {own * 1e6:9.0f} | "
+                             f"{cumulative * 1e6:10.0f} | "
+                             f"{'  ' * depth}{name}")
+        
+        slowest = sorted((item for item in self.imports if item[3] == 0),
+                         key=lambda item: -item[2])[:5]
+        lines.append("slowest top-level imports: " +
+                     ", ".join(f"{name} {cumulative * 1e3:.0f} ms"
+                               for name, _, cumulative, _ in slowest))
+        for label, seconds in self.milestones:
+            lines.append(f"startup: {seconds * 1e3:8.1f} ms {label}")
+        return lines
+    
+    def print(self, file=None, min_seconds=0.001):
+        """Write the report, to stderr by default like -X importtime"""
+        file = sys.stderr if file is None else file
+        for line in self.lines(min_seconds):
+            print(line, file=file)
@@ -0,0 +1,68 @@
+"""
+Tests for parsing, compiling and evaluating expressions
+"""
+
+import unittest
+
+from expression_parser import (ExpressionCache, ExpressionParser, to_infix,
+                               to_postfix, to_prefix, to_tree, tree_size)
+
+
+class TestTokenize(unittest.TestCase):
+    
+    def setUp(self):
+        self.parser = ExpressionParser()
+    
+    def test_number_after_number_is_a_parse_error(self):
+        for expression in ("3.5.2", "1.2.3x", "2 3", "1e5.5"):
+            with self.assertRaises(ValueError):
+                self.parser.tokenize(expression)
+    
+    def test_implicit_multiplication(self):
+        self.assertEqual(self.parser.evaluate_expression("2x3", {'x': 1.5}),
+                         9.0)
+
+
+class TestCompile(unittest.TestCase):
+    
+    def setUp(self):
+        self.parser = ExpressionParser(cache=ExpressionCache())
+    
+    def test_long_operator_chain_compiles(self):
+        compiled = self.parser.compile('+'.join(['x'] * 300))
+        self.assertEqual(compiled.evaluate({'x': 2.0}), 600.0)
+    
+    def test_chain_beyond_recursion_limit_compiles(self):
+        expression = '+'.join(['x'] * 1500)
+        self.assertEqual(tree_size(self.parser.parse(expression)), 2999)
+        compiled = self.parser.compile(expression)
+        self.assertEqual(compiled.evaluate({'x': 2.0}), 3000.0)
+    
+    def test_minimal_parentheses_keep_meaning(self):
+        for expression, expected in (("2-(3-4)", 3.0), ("2/(4*2)", 0.25),
+                                     ("-x^2", -9.0), ("(-x)^2", 9.0),
+                                     ("2^3^2", 512.0), ("(2^3)^2", 64.0),
+                                     ("x*-(x-1)", -6.0), ("--x", 3.0)):
+            self.assertEqual(self.parser.evaluate_expression(
+                expression, {'x': 3.0}), expected, expression)
+    
+    def test_too_deep_input_is_a_parse_error(self):
+        for expression in ('(' * 2000 + 'x' + ')' * 2000, '-' * 5000 + 'x',
+                           '+'.join(['x'] * 20000)):
+            with self.assertRaises(ValueError):
+                self.parser.compile(expression)
+
+
+
+class TestNotations(unittest.TestCase):
+    
+    def test_long_chain_renders_without_recursion(self):
+        tree = ExpressionParser().parse('-'.join(['x'] * 3000))
+        self.assertEqual(to_infix(tree), '-'.join(['x'] * 3000))
+        self.assertEqual(to_postfix(tree), 'x x -' + ' x -' * 2998)
+        self.assertEqual(to_prefix(tree), '- ' * 2999 + 'x' + ' x' * 2999)
+        self.assertTrue(to_tree(tree).startswith('(' * 2999 + 'x - x)'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+"""
+Tests for the grid evaluation backends against the plain NumPy tiles
+"""
+
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import grid_evaluator
+from expression_parser import ExpressionParser
+from grid_evaluator import (GridEvaluator, JitGridEvaluator,
+                            ProcessGridEvaluator, ThreadGridEvaluator,
+                            UfuncProgram, numba_available, select_evaluator,
+                            shutdown_pools)
+
+
+# Defined, undefined (NaN), infinite and overflowing cells
+EXPRESSIONS = ("sin(x)*cos(y)", "x^2 + y^2", "sqrt(x) + ln(y)",
+               "1/x + y%3", "x^(1/3) - abs(y)^2.5", "exp(x)^y",
+               "tan(x*y) - 2*x*y")
+
+
+def grid_axes(columns=53, rows=37):
+    """x and y values including 0, where 1/x and ln(y) are infinite"""
+    return np.linspace(-4, 4, columns), np.linspace(-3, 3, rows)
+
+
+def assert_same_grid(test, expected, actual, expression):
+    test.assertEqual(actual.shape, expected.shape, expression)
+    np.testing.assert_array_equal(np.isnan(actual), np.isnan(expected),
+                                  expression)
+    np.testing.assert_allclose(actual, expected, rtol=1e-12,
+                               err_msg=expression)
+
+
+class TestProcessGridEvaluator(unittest.TestCase):
+    
+    def setUp(self):
+        self.parser = ExpressionParser()
+    
+    def tearDown(self):
+        shutdown_pools()
+    
+    def test_matches_numpy_tiles(self):
+        x, y = grid_axes()
+        # 37 rows over 3 workers, each tile split again by max_bytes
+        evaluator = ProcessGridEvaluator(workers=3, max_bytes=53 * 8 * 40)
+        for expression in EXPRESSIONS:
+            compiled = self.parser.compile(expression)
+            assert_same_grid(self, GridEvaluator().evaluate(
+                compiled, 'x', x, 'y', y), evaluator.evaluate(
+                compiled, 'x', x, 'y', y), expression)
+    
+    def test_shared_memory_released_on_error(self):
+        blocks = []
+        shared_memory = grid_evaluator.shared_memory.SharedMemory
+        
+        def record(*args, **kwargs):
+            block = shared_memory(*args, **kwargs)
+            blocks.append(block.name)
+            return block
+        
+        x, y = grid_axes()
+        compiled = self.parser.compile("x + z")
+        with mock.patch.object(grid_evaluator.shared_memory, 'SharedMemory',
+                               side_effect=record):
+            with self.assertRaises(ValueError):
+                ProcessGridEvaluator(workers=2).evaluate(
+                    compiled, 'x', x, 'y', y)
+        
+        self.assertEqual(len(blocks), 1)
+        with self.assertRaises(FileNotFoundError):
+            shared_memory(name=blocks[0])
+
+
+class TestThreadGridEvaluator(unittest.TestCase):
+    
+    def setUp(self):
+        self.parser = ExpressionParser()
+    
+    def tearDown(self):
+        shutdown_pools()
+    
+    def assert_matches(self, expression, block_rows=5):
+        x, y = grid_axes()
+        compiled = self.parser.compile(expression)
+        # 37 rows in blocks of 5, so the last block of each chunk is short
+        evaluator = ThreadGridEvaluator(
+            workers=3, block_bytes=x.size * 8 * block_rows)
+        assert_same_grid(self, GridEvaluator().evaluate(
+            compiled, 'x', x, 'y', y), evaluator.evaluate(
+            compiled, 'x', x, 'y', y), expression)
+    
+    def test_matches_numpy_tiles(self):
+        for expression in EXPRESSIONS:
+            self.assert_matches(expression)
+        self.assert_matches(EXPRESSIONS[0], block_rows=1)
+        self.assert_matches(EXPRESSIONS[0], block_rows=100)
+    
+    def test_shared_subtrees_reuse_registers(self):
+        for expression in ("(x+y)*(x+y) - sin(x+y)/(x+y)",
+                           "sin(x)*sin(x) + cos(y)*sin(x) - x*y/(x*y + 1)",
+                           "(x - (y - (x - (y - (x - y)^2)^2)^2)^2)"):
+            self.assert_matches(expression)
+    
+    def test_scratch_buffers_bounded_by_depth(self):
+        expression = " + ".join(f"sin({k}*x + y)" for k in range(40))
+        program = UfuncProgram(self.parser.compile(expression).optimized)
+        self.assertLessEqual(len(program.slot_variables), 4)
+        self.assert_matches(expression)
+    
+    def test_undefined_name_raises(self):
+        x, y = grid_axes()
+        with self.assertRaises(ValueError):
+            ThreadGridEvaluator(workers=2).evaluate(
+                self.parser.compile("x + z"), 'x', x, 'y', y)
+
+
+@unittest.skipUnless(numba_available(), "Numba is not installed")
+class TestJitGridEvaluator(unittest.TestCase):
+    
+    def setUp(self):
+        self.parser = ExpressionParser()
+    
+    def test_kernel_matches_numpy_tiles(self):
+        x, y = grid_axes()
+        for expression in EXPRESSIONS:
+            compiled = self.parser.compile(expression)
+            evaluator = JitGridEvaluator()
+            actual = evaluator.evaluate(compiled, 'x', x, 'y', y)
+            self.assertEqual(evaluator.name, 'numba', expression)
+            assert_same_grid(self, GridEvaluator().evaluate(
+                compiled, 'x', x, 'y', y), actual, expression)
+    
+    def test_finest_surface_stage_uses_kernel(self):
+        self.assertIsInstance(select_evaluator(512 * 512), JitGridEvaluator)
+        self.assertNotIsInstance(select_evaluator(128 * 128),
+                                 JitGridEvaluator)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+"""
+Tests for interval evaluation and guaranteed function ranges
+"""
+
+import math
+import unittest
+
+from expression_parser import ExpressionParser
+from interval_arithmetic import evaluate_interval, function_range
+
+
+class TestIntervals(unittest.TestCase):
+    
+    def setUp(self):
+        self.parser = ExpressionParser()
+    
+    def test_cosine_encloses_value_near_zero_crossing(self):
+        result = evaluate_interval(self.parser.parse("cos(x)"),
+                                   {'x': (0.0, math.pi / 2)})
+        self.assertLessEqual(result.lo, math.cos(math.pi / 2))
+        self.assertEqual(result.hi, 1.0)
+    
+    def test_long_chain_evaluates(self):
+        result = evaluate_interval(self.parser.parse('+'.join(['x'] * 3000)),
+                                   {'x': (0.0, 1.0)})
+        self.assertLessEqual(result.lo, 0.0)
+        self.assertGreaterEqual(result.hi, 3000.0)
+    
+    def test_power_of_folded_integer_exponent(self):
+        for exponent in ("(1+1)", "(4/2)", "(2*2)", "(2^3)"):
+            result = evaluate_interval(self.parser.parse(f"x^{exponent}"),
+                                       {'x': (-2.0, -1.0)})
+            self.assertFalse(result.empty, exponent)
+            self.assertFalse(result.partial, exponent)
+    
+    def test_modulo_near_period_boundary(self):
+        result = evaluate_interval(self.parser.parse("sqrt(x) % 3"),
+                                   {'x': (0.0, 4.0)})
+        self.assertLessEqual(result.lo, 0.0)
+        self.assertGreaterEqual(result.hi, 2.0)
+        result = evaluate_interval(self.parser.parse("x % 3"),
+                                   {'x': (-5e-324, 0.0)})
+        self.assertLessEqual(result.lo, 0.0)
+        self.assertGreaterEqual(result.hi, 3.0)
+    
+    def test_function_range_refines_both_bounds(self):
+        # The minimum converges at once; the maximum must not be starved
+        low, high = function_range(self.parser.parse("x^2*cos(x)"), 'x',
+                                   -3.0, 3.0, max_evaluations=64)
+        self.assertAlmostEqual(low, 9 * math.cos(3.0), places=6)
+        self.assertGreaterEqual(high, 0.5497)
+        self.assertLess(high, 0.6)
+
+
+if __name__ == "__main__":
+    unittest.main()
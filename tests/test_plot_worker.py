@@ -0,0 +1,129 @@
+"""
+Tests for the background plot worker, with a fake Tk root
+"""
+
+import threading
+import time
+import unittest
+
+from plot_worker import PlotWorker
+
+
+class FakeRoot:
+    """Stands in for Tk: after() queues callbacks that run() calls here"""
+    
+    def __init__(self):
+        self.callbacks = []
+    
+    def after(self, milliseconds, callback, *args):
+        self.callbacks.append((callback, args))
+    
+    def run(self, timeout=5.0):
+        """Run queued callbacks, as the Tk main loop would, until idle"""
+        deadline = time.monotonic() + timeout
+        while self.callbacks:
+            if time.monotonic() > deadline:
+                raise AssertionError("worker results never arrived")
+            callback, args = self.callbacks.pop(0)
+            callback(*args)
+            time.sleep(0.001)
+
+
+class TestPlotWorker(unittest.TestCase):
+    
+    def setUp(self):
+        self.root = FakeRoot()
+        self.worker = PlotWorker(self.root)
+        self.drawn = []
+        self.errors = []
+    
+    def tearDown(self):
+        self.worker.shutdown()
+    
+    def draw(self, value):
+        self.drawn.append((value, threading.current_thread()))
+    
+    def test_result_is_drawn_on_the_polling_thread(self):
+        self.worker.submit('2d', lambda: 42, self.draw)
+        self.root.run()
+        self.assertEqual(self.drawn, [(42, threading.current_thread())])
+        self.assertEqual(self.worker._pending, 0)
+    
+    def test_newer_request_discards_running_and_queued_ones(self):
+        started = threading.Event()
+        release = threading.Event()
+        computed = []
+        
+        def slow():
+            started.set()
+            release.wait(5)
+            computed.append('slow')
+            return 'slow'
+        
+        def queued():
+            computed.append('queued')
+            return 'queued'
+        
+        self.worker.submit('2d', slow, self.draw)
+        started.wait(5)
+        self.worker.submit('2d', queued, self.draw)
+        self.worker.submit('2d', lambda: 'newest', self.draw)
+        release.set()
+        self.root.run()
+        
+        # The running one finished but was not drawn; the queued one
+        # was cancelled before it started
+        self.assertEqual(computed, ['slow'])
+        self.assertEqual([value for value, _ in self.drawn], ['newest'])
+        self.assertEqual(self.worker._pending, 0)
+        self.assertEqual(self.root.callbacks, [])
+    
+    def test_channels_are_independent(self):
+        self.worker.submit('2d', lambda: '2d', self.draw)
+        self.worker.submit('3d', lambda: '3d', self.draw)
+        self.root.run()
+        self.assertEqual(sorted(value for value, _ in self.drawn),
+                         ['2d', '3d'])
+    
+    def test_error_goes_to_on_error_on_the_polling_thread(self):
+        def fail():
+            raise ValueError("bad expression")
+        
+        def on_error(error):
+            self.errors.append((error, threading.current_thread()))
+        
+        self.worker.submit('2d', fail, self.draw, on_error)
+        self.root.run()
+        self.assertEqual(self.drawn, [])
+        (error, thread), = self.errors
+        self.assertIsInstance(error, ValueError)
+        self.assertIs(thread, threading.current_thread())
+        self.assertEqual(self.worker._pending, 0)
+    
+    def test_error_without_handler_is_dropped(self):
+        def fail():
+            raise ValueError("bad expression")
+        
+        self.worker.submit('2d', fail, self.draw)
+        self.root.run()
+        self.assertEqual(self.drawn, [])
+        self.assertEqual(self.worker._pending, 0)
+    
+    def test_stale_error_is_discarded(self):
+        release = threading.Event()
+        
+        def fail():
+            release.wait(5)
+            raise ValueError("stale")
+        
+        self.worker.submit('2d', fail, self.draw, self.errors.append)
+        self.worker.submit('2d', lambda: 'fresh', self.draw,
+                           self.errors.append)
+        release.set()
+        self.root.run()
+        self.assertEqual(self.errors, [])
+        self.assertEqual([value for value, _ in self.drawn], ['fresh'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,186 @@
+"""
+Tests for the plotters, drawn on the Agg backend
+"""
+
+import unittest
+
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+from matplotlib.figure import Figure
+
+from plotters import (Plotter2D, PlotterImplicit, SampleCache,
+                      adaptive_mesh, adaptive_sample)
+
+
+class TestPlotter2D(unittest.TestCase):
+    
+    def setUp(self):
+        self.figure = Figure()
+        self.plotter = Plotter2D()
+    
+    def test_plot_after_error_plot_draws_new_expression(self):
+        self.plotter.plot(self.figure, "(-8)^(1/3)")
+        self.plotter.plot(self.figure, "y")
+        self.assertIsNone(self.plotter.line)
+        
+        self.plotter.plot(self.figure, "2^x")
+        x_values, y_values = self.plotter.line.get_data()
+        np.testing.assert_allclose(y_values, 2.0 ** np.asarray(x_values))
+        self.assertEqual(self.plotter.ax.get_xlim(), (-10, 10))
+    
+    def test_folded_exponent_plots_negative_half(self):
+        self.plotter.plot(self.figure, "x^(1+1)", -10, 10)
+        x_values, y_values = self.plotter.line.get_data()
+        defined = np.isfinite(y_values)
+        self.assertAlmostEqual(np.min(x_values[defined]), -10.0)
+        self.assertAlmostEqual(np.max(x_values[defined]), 10.0)
+    
+    def test_y_limits_enclose_modulo_from_zero(self):
+        y_min, y_max = self.plotter.y_limits("sqrt(x) % 3", 0, 4)
+        self.assertLess(y_min, 0.0)
+        self.assertGreater(y_max, 2.0)
+    
+    def test_viewport_resampling_ignores_previous_y_range(self):
+        # The toolbar's Home sets x before y, as in _set_view
+        self.plotter.plot(self.figure, "x")
+        ax = self.plotter.ax
+        ax.set_xlim(0, 5)
+        ax.set_ylim(3, 5)
+        ax.set_xlim(-10, 10)
+        x_values, y_values = self.plotter.line.get_data()
+        defined = np.isfinite(y_values)
+        self.assertAlmostEqual(np.min(x_values[defined]), -10.0)
+        self.assertAlmostEqual(np.max(x_values[defined]), 10.0)
+    
+    def test_reversed_and_empty_ranges(self):
+        x_values, y_values, _ = self.plotter.sample("x^2", 3, -3, 61,
+                                                    cache=False)
+        self.assertEqual(np.count_nonzero(np.isfinite(y_values)), 61)
+        self.plotter.plot(self.figure, "x^2", 3, -3)
+        self.assertEqual(self.plotter.ax.get_xlim(), (3, -3))
+        
+        x_values, y_values, y_limits = self.plotter.sample("x^2", 2, 2, 10,
+                                                           cache=False)
+        np.testing.assert_array_equal(y_values, np.full(10, 4.0))
+        self.assertEqual(len(y_limits), 0)
+    
+    def test_autoscaled_y_limits_follow_new_expression(self):
+        self.plotter.plot(self.figure, "x%3")
+        self.plotter.plot(self.figure, "5")
+        y_min, y_max = self.plotter.ax.get_ylim()
+        self.assertLess(y_min, 5.0)
+        self.assertGreater(y_max, 5.0)
+        self.assertGreater(y_min, 3.0)
+
+
+class TestPlotterImplicit(unittest.TestCase):
+    
+    def test_no_walls_at_poles(self):
+        segments, = PlotterImplicit().sample("y = tan(x)")
+        middle = segments.mean(axis=1)
+        residual = np.abs(middle[:, 1] - np.tan(middle[:, 0]))
+        self.assertLess(residual.max(), 0.1)
+    
+    def test_smooth_curve_is_kept(self):
+        segments, = PlotterImplicit().sample("x^2 + y^2 = 4")
+        radius = np.hypot(segments[..., 0], segments[..., 1])
+        np.testing.assert_allclose(radius, 2.0, atol=1e-3)
+        # The whole circle, not just parts of it
+        length = np.hypot(*(segments[:, 1] - segments[:, 0]).T).sum()
+        self.assertAlmostEqual(length, 4 * np.pi, places=2)
+
+
+class TestAdaptiveMesh(unittest.TestCase):
+    
+    def test_evaluations_stay_within_budget(self):
+        function = lambda x, y: np.sin(3 * x) * np.cos(3 * y)
+        for max_evaluations in (None, 2000):
+            x, y, z, triangles, evaluations = adaptive_mesh(
+                function, (-2, 2), (-2, 2), max_vertices=1000,
+                max_evaluations=max_evaluations)
+            self.assertLessEqual(x.size, 1000)
+            self.assertLessEqual(evaluations, max_evaluations or 5000)
+            np.testing.assert_allclose(z, function(x, y))
+
+class TestSampleCache(unittest.TestCase):
+    
+    def test_evicts_least_recently_used_beyond_budget(self):
+        cache = SampleCache(max_bytes=2000)
+        for key in 'abc':
+            cache.put(key, (np.zeros(50), np.zeros(50)))
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.bytes, 1600)
+        self.assertEqual(cache.evictions, 1)
+        self.assertIsNone(cache.get('a'))
+        
+        # Touching b makes c the oldest
+        cache.get('b')
+        cache.put('d', (np.zeros(100),))
+        self.assertIsNone(cache.get('c'))
+        self.assertIsNotNone(cache.get('b'))
+        self.assertLessEqual(cache.bytes, cache.max_bytes)
+    
+    def test_replacing_and_oversized_entries(self):
+        cache = SampleCache(max_bytes=2000)
+        cache.put('a', (np.zeros(100),))
+        cache.put('a', (np.zeros(200),))
+        self.assertEqual(cache.bytes, 1600)
+        
+        cache.put('big', (np.zeros(300),))
+        self.assertIsNone(cache.get('big'))
+        self.assertIsNotNone(cache.get('a'))
+    
+    def test_broadcast_arrays_cost_one_row(self):
+        cache = SampleCache(max_bytes=2000)
+        row = np.broadcast_to(np.zeros(100), (1000, 100))
+        cache.put('a', (row,))
+        self.assertEqual(cache.bytes, 800)
+        self.assertFalse(cache.get('a')[0].flags.writeable)
+
+class TestAdaptiveSample(unittest.TestCase):
+    
+    def sample(self, function, x_min, x_max, max_evaluations=300):
+        evaluated = []
+        
+        def evaluate(x):
+            evaluated.append(x.size)
+            with np.errstate(all='ignore'):
+                return function(x)
+        
+        x, y = adaptive_sample(evaluate, x_min, x_max,
+                               max_evaluations=max_evaluations)
+        self.assertLessEqual(sum(evaluated), max_evaluations)
+        return x, y
+    
+    def test_pole_breaks_line_and_attracts_points(self):
+        x, y = self.sample(lambda x: 1 / x, -1, 1.3)
+        breaks = x[np.isnan(y)]
+        self.assertEqual(breaks.size, 1)
+        self.assertLess(abs(breaks[0]), 1e-3)
+        self.assertGreater(np.count_nonzero(np.abs(x) < 0.1),
+                           10 * np.count_nonzero(np.abs(x - 1) < 0.1))
+    
+    def test_tangent_pole_is_not_joined(self):
+        x, y = self.sample(np.tan, 0, 3)
+        breaks = x[np.isnan(y)]
+        self.assertEqual(breaks.size, 1)
+        self.assertAlmostEqual(breaks[0], np.pi / 2, places=3)
+    
+    def test_steps_break_at_each_jump(self):
+        x, y = self.sample(np.floor, -2.5, 2.5)
+        breaks = x[np.isnan(y)]
+        np.testing.assert_allclose(breaks, [-2, -1, 0, 1, 2], atol=1e-3)
+        # Every drawn segment stays on one step
+        dy = np.diff(y)
+        self.assertEqual(np.abs(dy[np.isfinite(dy)]).max(), 0)
+    
+    def test_smooth_curve_has_no_breaks(self):
+        for max_evaluations in (50, 300):
+            x, y = self.sample(np.sin, -10, 10, max_evaluations)
+            self.assertTrue(np.all(np.isfinite(y)))
+            np.testing.assert_allclose(y, np.sin(x))
+
+
+if __name__ == "__main__":
+    unittest.main()